@@ -1,17 +1,47 @@
 """Initialise."""
 import asyncio
 
-from pyskyqremote.skyq_remote import SkyQRemote
-
-from homeassistant.const import CONF_HOST
-
-from .const import DOMAIN, SKYQREMOTE, UNDO_UPDATE_LISTENER
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
+from homeassistant.const import CONF_HOST, CONF_NAME
+
+from .classes.config import build_config
+from .client import AsyncSkyQRemote
+from .const import (
+    CONF_STARTUP_CONCURRENCY,
+    COORDINATOR,
+    DOMAIN,
+    SKYQREMOTE,
+    START_TASK,
+    STARTUP_CONCURRENCY,
+    UNDO_UPDATE_LISTENER,
+)
+from .coordinator import SkyQCoordinator
+from .startup import async_getStartup
 
 PLATFORMS = ["media_player"]
 
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(
+                    CONF_STARTUP_CONCURRENCY, default=STARTUP_CONCURRENCY
+                ): cv.positive_int
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 
 async def async_setup(hass, config):
     """Set up the integration."""
+    concurrency = config.get(DOMAIN, {}).get(
+        CONF_STARTUP_CONCURRENCY, STARTUP_CONCURRENCY
+    )
+    await async_getStartup(hass, concurrency)
     return True
 
 
@@ -22,9 +52,21 @@ async def async_setup_entry(hass, config_entry):
     undo_listener = config_entry.add_update_listener(update_listener)
 
     hass.data.setdefault(DOMAIN, {})
-    remote = await hass.async_add_executor_job(SkyQRemote, host)
+    remote = AsyncSkyQRemote(hass, host)
+    config = build_config(
+        config_entry.unique_id, config_entry.data[CONF_NAME], config_entry.options
+    )
+    coordinator = SkyQCoordinator(hass, remote, config)
+    # The box is set up in the background, so an unreachable one doesn't hold up startup
+    startup = await async_getStartup(hass)
+    startTask = hass.async_create_task(
+        startup.async_start(host, coordinator.async_start)
+    )
+
     hass.data[DOMAIN][config_entry.entry_id] = {
         SKYQREMOTE: remote,
+        COORDINATOR: coordinator,
+        START_TASK: startTask,
         UNDO_UPDATE_LISTENER: undo_listener,
     }
 
@@ -50,6 +92,9 @@ async def async_unload_entry(hass, config_entry):
     hass.data[DOMAIN][config_entry.entry_id][UNDO_UPDATE_LISTENER]()
 
     if unload_ok:
+        # The box may still be starting, or waiting to
+        hass.data[DOMAIN][config_entry.entry_id][START_TASK].cancel()
+        await hass.data[DOMAIN][config_entry.entry_id][COORDINATOR].async_stop()
         hass.data[DOMAIN].pop(config_entry.entry_id)
 
     return unload_ok
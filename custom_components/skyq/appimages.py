@@ -0,0 +1,74 @@
+"""Index of the application images provided for the Sky Q media players."""
+import logging
+import os
+from datetime import timedelta
+
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    APP_IMAGE_DIRECTORY,
+    APP_IMAGE_SCAN_INTERVAL,
+    APP_IMAGE_URL_BASE,
+    APP_IMAGES,
+    DOMAIN,
+)
+from .executor import getExecutor
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_getAppImages(hass):
+    """Get the image index shared by all boxes, starting it on first use."""
+    hass.data.setdefault(DOMAIN, {})
+    appImages = hass.data[DOMAIN].get(APP_IMAGES)
+    if not appImages:
+        appImages = SkyQAppImages(hass)
+        hass.data[DOMAIN][APP_IMAGES] = appImages
+        await appImages.async_start()
+    return appImages
+
+
+class SkyQAppImages:
+    """Application images available in the www/community/skyq directory."""
+
+    def __init__(self, hass):
+        """Initialise the index."""
+        self._hass = hass
+        self._executor = getExecutor(hass)
+        self._directory = hass.config.path(*APP_IMAGE_DIRECTORY)
+        self._images = set()
+        self._modified = None
+
+    async def async_start(self):
+        """Scan the directory, then watch it for images being added or removed."""
+        await self._async_scan()
+        async_track_time_interval(
+            self._hass, self._async_scan, timedelta(seconds=APP_IMAGE_SCAN_INTERVAL)
+        )
+
+    def getImageUrl(self, appTitle):
+        """Get the local URL of the image for the app, if there is one."""
+        imageName = appTitle.casefold()
+        if f"{imageName}.png" in self._images:
+            return APP_IMAGE_URL_BASE.format(imageName)
+        return None
+
+    async def _async_scan(self, now=None):
+        modified, images = await self._executor.async_run(
+            _scanDirectory, self._directory, self._modified
+        )
+        if images is not None:
+            _LOGGER.debug(f"App images found: {self._directory} : {len(images)}")
+            self._images = images
+        self._modified = modified
+
+
+def _scanDirectory(directory, lastModified):
+    """List the directory, unless it is unchanged since it was last listed."""
+    try:
+        modified = os.stat(directory).st_mtime
+        if modified == lastModified:
+            return modified, None
+        return modified, set(os.listdir(directory))
+    except OSError:
+        return None, set()
@@ -0,0 +1,88 @@
+"""Circuit breaker for a Sky Q box that has stopped answering."""
+import asyncio
+import logging
+import time
+
+from .const import (
+    BREAKER_BACKOFF_MAX,
+    BREAKER_BACKOFF_MIN,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_PROBE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SkyQCircuitBreaker:
+    """Stop calling a box after repeated failures, probing it cheaply until it answers.
+
+    Whilst open, the box is only probed with a TCP connect, backing off
+    exponentially. Once a probe connects, the next full request decides
+    whether the breaker closes or stays open.
+    """
+
+    def __init__(self, host, port):
+        """Initialise the breaker, closed."""
+        self._host = host
+        self._port = port
+        self._failures = 0
+        self._backoff = None
+        self._nextProbe = 0
+
+    @property
+    def open(self):
+        """Whether full requests to the box are being held back."""
+        return self._backoff is not None
+
+    async def async_allowRequest(self):
+        """Check whether a full request should be made to the box."""
+        if not self.open:
+            return True
+        if time.monotonic() < self._nextProbe:
+            return False
+        if await self._async_probe():
+            _LOGGER.debug(f"Box answering probe, trying it: {self._host}")
+            return True
+        self._retryLater()
+        return False
+
+    def recordResult(self, success):
+        """Record whether a full request to the box succeeded."""
+        if success:
+            if self.open:
+                _LOGGER.debug(f"Circuit closed: {self._host}")
+            self._failures = 0
+            self._backoff = None
+            return
+
+        self._failures += 1
+        if self.open:
+            self._retryLater()
+        elif self._failures >= BREAKER_FAILURE_THRESHOLD:
+            _LOGGER.debug(f"Circuit opened: {self._host} : {self._failures} failures")
+            self._backoff = BREAKER_BACKOFF_MIN
+            self._nextProbe = time.monotonic() + self._backoff
+
+    def summary(self):
+        """Describe the state of the breaker."""
+        return {
+            "open": self.open,
+            "failures": self._failures,
+            "probe_in": max(0, round(self._nextProbe - time.monotonic()))
+            if self.open
+            else None,
+        }
+
+    def _retryLater(self):
+        self._backoff = min(self._backoff * 2, BREAKER_BACKOFF_MAX)
+        self._nextProbe = time.monotonic() + self._backoff
+
+    async def _async_probe(self):
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), BREAKER_PROBE_TIMEOUT
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        return True
@@ -0,0 +1 @@
+"""Initialise."""
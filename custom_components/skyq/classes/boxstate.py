@@ -0,0 +1,17 @@
+"""Structure of a snapshot of the Sky Q box state."""
+from dataclasses import dataclass, field
+
+from pyskyqremote.classes.media import Media
+from pyskyqremote.classes.programme import Programme, RecordedProgramme
+
+
+@dataclass(frozen=True)
+class BoxState:
+    """Sky Q box state, as retrieved by the coordinator."""
+
+    powerStatus: str = field(init=True, repr=True, compare=True)
+    currentState: str = field(default=None, repr=True, compare=True)
+    app: str = field(default=None, repr=True, compare=True)
+    media: Media = field(default=None, repr=True, compare=True)
+    programme: Programme = field(default=None, repr=True, compare=True)
+    recording: RecordedProgramme = field(default=None, repr=True, compare=True)
@@ -0,0 +1,44 @@
+"""Indexed lookups into the Sky Q channel list."""
+from ..const import CHANNEL_DISPLAY
+
+
+class ChannelIndex:
+    """Channel list indexed by name, number and display name."""
+
+    def __init__(self, channels):
+        """Build the indexes once for the retrieved channel list."""
+        self.channels = channels
+        self.displayNames = []
+        self._byName = {}
+        self._byNumber = {}
+        self._byDisplay = {}
+        self._displayByName = {}
+
+        for channel in channels:
+            display = CHANNEL_DISPLAY.format(channel.channelno, channel.channelname)
+            self.displayNames.append(display)
+            # Where a name or number appears twice, the first in the list is used
+            self._byName.setdefault(channel.channelname, channel)
+            self._byNumber.setdefault(channel.channelno, channel)
+            self._byDisplay.setdefault(display, channel)
+            self._displayByName.setdefault(channel.channelname, display)
+
+    def __len__(self):
+        """Return the number of channels."""
+        return len(self.channels)
+
+    def getByName(self, channelname):
+        """Get the channel with the given name."""
+        return self._byName.get(channelname)
+
+    def getByNumber(self, channelno):
+        """Get the channel with the given number."""
+        return self._byNumber.get(channelno)
+
+    def getByDisplay(self, display):
+        """Get the channel for the given display name."""
+        return self._byDisplay.get(display)
+
+    def getDisplay(self, channelname):
+        """Get the display name for the channel with the given name."""
+        return self._displayByName.get(channelname)
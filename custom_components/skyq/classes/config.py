@@ -0,0 +1,112 @@
+"""Structure of the Sky Q configuration."""
+from dataclasses import InitVar, dataclass, field
+
+from ..const import (
+    CONF_CACHE_IMAGES,
+    CONF_CALL_TIMEOUT,
+    CONF_CHANNEL_SOURCES,
+    CONF_COUNTRY,
+    CONF_GEN_SWITCH,
+    CONF_LIVE_TV,
+    CONF_OUTPUT_PROGRAMME_IMAGE,
+    CONF_ROOM,
+    CONF_SOURCES,
+    CONF_TEST_CHANNEL,
+    CONF_UNAVAILABLE_AFTER,
+    CONF_UPDATE_BUDGET,
+    CONF_VOLUME_ENTITY,
+    CONST_DEFAULT_ROOM,
+    FEATURE_BASIC,
+    FEATURE_IMAGE,
+    FEATURE_IMAGE_CACHE,
+    FEATURE_LIVE_TV,
+    FEATURE_SWITCHES,
+    TIMEOUT,
+    UNAVAILABLE_AFTER,
+    UPDATE_BUDGET,
+)
+from ..utils import convert_sources
+
+ENABLED_FEATURES = (
+    FEATURE_BASIC
+    | FEATURE_IMAGE
+    | FEATURE_LIVE_TV
+    | FEATURE_SWITCHES
+    | FEATURE_IMAGE_CACHE
+)
+
+
+@dataclass
+class Config:
+    """Sky Q configuration information."""
+
+    unique_id: str = field(init=True, repr=True, compare=True)
+    name: str = field(init=True, repr=True, compare=True)
+    room: str = field(init=True, repr=True, compare=True)
+    volume_entity: str = field(init=True, repr=True, compare=True)
+    test_channel: str = field(init=True, repr=True, compare=True)
+    overrideCountry: str = field(init=True, repr=True, compare=True)
+    custom_sources: field(init=True, repr=False, compare=True)
+    channel_sources: list = field(init=True, repr=True, compare=True)
+    generate_switches_for_channels: InitVar[bool]
+    output_programme_image: InitVar[bool]
+    live_tv: InitVar[bool]
+    cache_images: InitVar[bool]
+    call_timeout: float = field(default=TIMEOUT, repr=True, compare=True)
+    update_budget: float = field(default=UPDATE_BUDGET, repr=True, compare=True)
+    unavailable_after: int = field(default=UNAVAILABLE_AFTER, repr=True, compare=True)
+    enabled_features: int = None
+    source_list = None
+
+    def __post_init__(
+        self,
+        generate_switches_for_channels,
+        output_programme_image,
+        live_tv,
+        cache_images,
+    ):
+        """Set up the config."""
+        self.enabled_features = ENABLED_FEATURES
+        self.source_list = []
+
+        if not (output_programme_image):
+            self.enabled_features ^= FEATURE_IMAGE
+
+        if not (live_tv):
+            self.enabled_features ^= FEATURE_LIVE_TV
+
+        if not (generate_switches_for_channels):
+            self.enabled_features ^= FEATURE_SWITCHES
+
+        if not (cache_images):
+            self.enabled_features ^= FEATURE_IMAGE_CACHE
+
+        if isinstance(self.custom_sources, list):
+            self.custom_sources = convert_sources(sources_list=self.custom_sources)
+        elif not self.custom_sources:
+            self.custom_sources = []
+
+        if self.custom_sources and len(self.custom_sources) > 0:
+            self.source_list = [*self.custom_sources.keys()]
+        self.source_list += self.channel_sources
+
+
+def build_config(unique_id, name, config_item):
+    """Build the configuration from YAML config or config entry options."""
+    return Config(
+        unique_id,
+        name,
+        config_item.get(CONF_ROOM, CONST_DEFAULT_ROOM),
+        config_item.get(CONF_VOLUME_ENTITY, None),
+        config_item.get(CONF_TEST_CHANNEL),
+        config_item.get(CONF_COUNTRY),
+        config_item.get(CONF_SOURCES),
+        config_item.get(CONF_CHANNEL_SOURCES, []),
+        config_item.get(CONF_GEN_SWITCH, False),
+        config_item.get(CONF_OUTPUT_PROGRAMME_IMAGE, True),
+        config_item.get(CONF_LIVE_TV, True),
+        config_item.get(CONF_CACHE_IMAGES, False),
+        config_item.get(CONF_CALL_TIMEOUT, TIMEOUT),
+        config_item.get(CONF_UPDATE_BUDGET, UPDATE_BUDGET),
+        config_item.get(CONF_UNAVAILABLE_AFTER, UNAVAILABLE_AFTER),
+    )
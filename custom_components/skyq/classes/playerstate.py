@@ -0,0 +1,25 @@
+"""Structure of a snapshot of the Sky Q media player state."""
+from dataclasses import dataclass, field
+
+from homeassistant.const import STATE_OFF
+
+
+@dataclass(frozen=True)
+class PlayerState:
+    """Sky Q media player state, as shown in Home Assistant."""
+
+    available: bool = field(default=True, repr=True, compare=True)
+    state: str = field(default=STATE_OFF, repr=True, compare=True)
+    skyqType: str = field(default=STATE_OFF, repr=True, compare=True)
+    title: str = field(default=None, repr=True, compare=True)
+    channel: str = field(default=None, repr=True, compare=True)
+    season: int = field(default=None, repr=True, compare=True)
+    episode: int = field(default=None, repr=True, compare=True)
+    imageUrl: str = field(default=None, repr=True, compare=True)
+    imageRemotelyAccessible: bool = field(default=False, repr=True, compare=True)
+    imageCached: bool = field(default=False, repr=True, compare=True)
+    volumeLevel: float = field(default=0, repr=True, compare=True)
+    volumeMuted: bool = field(default=True, repr=True, compare=True)
+    volumeFeatures: int = field(default=None, repr=True, compare=True)
+    updateInterval: int = field(default=None, repr=True, compare=True)
+    stateRetrieved: str = field(default=None, repr=True, compare=True)
@@ -0,0 +1,85 @@
+"""Indexed lookups into the EPG schedules of channels."""
+from array import array
+from bisect import bisect_right
+from calendar import timegm
+
+
+class ScheduleIndex:
+    """Programmes of each channel, searchable by time without going to the EPG."""
+
+    def __init__(self):
+        """Initialise the empty index."""
+        self._channels = {}
+
+    def __len__(self):
+        """Return the number of programmes indexed."""
+        return sum(len(schedule.programmes) for schedule in self._channels.values())
+
+    def hasDay(self, sid, day):
+        """Check whether the schedule for the day has been added for the channel."""
+        schedule = self._channels.get(sid)
+        return bool(schedule) and day in schedule.days
+
+    def addDay(self, sid, day, programmes):
+        """Add the schedule for a day, merging it into what the channel has."""
+        schedule = self._channels.get(sid)
+        if not schedule:
+            schedule = self._channels[sid] = _ChannelSchedule()
+        # A programme running over midnight is in the schedules of both days
+        merged = {p.starttime: p for p in schedule.programmes}
+        merged.update((p.starttime, p) for p in programmes)
+        schedule.setProgrammes([merged[start] for start in sorted(merged)])
+        schedule.days.add(day)
+
+    def prune(self, now):
+        """Drop the programmes that have finished, and the days before today."""
+        today = now.date()
+        for sid, schedule in list(self._channels.items()):
+            first = bisect_right(schedule.starts, _timestamp(now)) - 1
+            if first > 0:
+                schedule.setProgrammes(schedule.programmes[first:])
+            schedule.days = {day for day in schedule.days if day >= today}
+            if not schedule.programmes and not schedule.days:
+                del self._channels[sid]
+
+    def getNow(self, sid, when):
+        """Get the programme on the channel at the time."""
+        schedule, position = self._find(sid, when)
+        if position < 0:
+            return None
+        programme = schedule.programmes[position]
+        return programme if when < programme.endtime else None
+
+    def getNext(self, sid, when):
+        """Get the programme that starts next on the channel after the time."""
+        schedule, position = self._find(sid, when)
+        if position + 1 >= len(schedule.programmes):
+            return None
+        return schedule.programmes[position + 1]
+
+    def _find(self, sid, when):
+        schedule = self._channels.get(sid, _EMPTY)
+        return schedule, bisect_right(schedule.starts, _timestamp(when)) - 1
+
+
+class _ChannelSchedule:
+    """Start times of a channel's programmes, in order, alongside the programmes."""
+
+    __slots__ = ("starts", "programmes", "days")
+
+    def __init__(self):
+        self.starts = array("d")
+        self.programmes = []
+        self.days = set()
+
+    def setProgrammes(self, programmes):
+        self.starts = array("d", (_timestamp(p.starttime) for p in programmes))
+        self.programmes = programmes
+
+
+_EMPTY = _ChannelSchedule()
+
+
+def _timestamp(when):
+    """Seconds since the epoch, for a naive UTC datetime as the EPG provides."""
+    return timegm(when.utctimetuple())
@@ -0,0 +1,678 @@
+"""Asynchronous access to the Sky Q box."""
+import asyncio
+import contextvars
+import functools
+import importlib
+import json
+import logging
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from operator import attrgetter
+
+import aiohttp
+import pycountry
+from pyskyqremote.classes.channel import Channel
+from pyskyqremote.classes.channellist import ChannelList
+from pyskyqremote.classes.device import Device
+from pyskyqremote.classes.media import Media
+from pyskyqremote.classes.programme import RecordedProgramme
+from pyskyqremote.const import (
+    APP_EPG,
+    APP_STATUS_VISIBLE,
+    COMMANDS,
+    CURRENT_TRANSPORT_STATE,
+    CURRENT_URI,
+    KNOWN_COUNTRIES,
+    PVR,
+    REST_BASE_URL,
+    REST_CHANNEL_LIST,
+    REST_PATH_DEVICEINFO,
+    REST_PATH_SYSTEMINFO,
+    REST_RECORDING_DETAILS,
+    SKY_PLAY_URN,
+    SKY_STATE_OFF,
+    SKY_STATE_ON,
+    SKY_STATE_PAUSED,
+    SKY_STATE_PLAYING,
+    SKY_STATE_STANDBY,
+    SOAP_ACTION,
+    SOAP_CONTROL_BASE_URL,
+    SOAP_DESCRIPTION_BASE_URL,
+    SOAP_PAYLOAD,
+    SOAP_USER_AGENT,
+    UPNP_GET_MEDIA_INFO,
+    UPNP_GET_TRANSPORT_INFO,
+    WS_BASE_URL,
+    WS_CURRENT_APPS,
+    XSI,
+)
+from pyskyqremote.const_test import TEST_CHANNEL_LIST
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    CALL_STATS,
+    CALL_STATS_WINDOW,
+    DOMAIN,
+    EPG_WARNING_INTERVAL,
+    PROGRAMME_CACHE_SIZE,
+    RECORDING_CACHE_SIZE,
+    SKY_BROWSE_URN,
+    TIMEOUT,
+    UPNP_DESCRIPTION_MAX,
+)
+from .executor import getExecutor
+from .remotecontrol import SkyQRemoteControl
+from .util.cache import LRUCache
+from .util.stats import CallStats
+
+_LOGGER = logging.getLogger(__name__)
+
+_callOutcome = contextvars.ContextVar("callOutcome", default=None)
+
+
+def getCallStats(hass, host):
+    """Get the call statistics of a box, shared by everything that calls it."""
+    hass.data.setdefault(DOMAIN, {})
+    allStats = hass.data[DOMAIN].setdefault(CALL_STATS, {})
+    if host not in allStats:
+        allStats[host] = CallStats(CALL_STATS_WINDOW)
+    return allStats[host]
+
+
+class _CallOutcome:
+    """Whether anything went wrong during a timed call."""
+
+    __slots__ = ("failed",)
+
+    def __init__(self):
+        self.failed = False
+
+
+def _timed(callType):
+    """Time calls of the method into the box's call statistics."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            outcome = _CallOutcome()
+            token = _callOutcome.set(outcome)
+            start = time.perf_counter()
+            try:
+                return await method(self, *args, **kwargs)
+            except Exception:
+                outcome.failed = True
+                raise
+            finally:
+                self.callStats.record(
+                    callType, time.perf_counter() - start, outcome.failed
+                )
+                _callOutcome.reset(token)
+                if outcome.failed:
+                    _callFailed()
+
+        return wrapper
+
+    return decorator
+
+
+def _callFailed():
+    """Count the timed call in progress as an error."""
+    outcome = _callOutcome.get()
+    if outcome:
+        outcome.failed = True
+
+
+class AsyncSkyQRemote:
+    """Asyncio implementation of the pyskyqremote SkyQRemote interface.
+
+    Box calls are made on the shared aiohttp session rather than in executor
+    threads. EPG retrieval is country specific, so still uses the pyskyqremote
+    country classes, on the integration's own executor.
+    """
+
+    commands = COMMANDS
+
+    def __init__(self, hass, host, port=49160, jsonPort=9006):
+        """Stand up a new SkyQ box."""
+        self.deviceSetup = False
+        self.host = host
+        self.eventSubURL = None
+        self.browseEventSubURL = None
+        self.callStats = getCallStats(hass, host)
+        self._hass = hass
+        self._executor = getExecutor(hass)
+        self._executor.addBox(host)
+        self._websession = async_get_clientsession(hass)
+        self.jsonPort = jsonPort
+        self.callTimeout = TIMEOUT
+        self._remoteControl = SkyQRemoteControl(host, port)
+        self._overrideCountry = None
+        self._epgCountryCode = None
+        self._test_channel = None
+        self._remoteCountry = None
+        self._soapControlURL = None
+        self._currentApp = APP_EPG
+        self._channels = []
+        self._lastEpg = None
+        self._lastEpgProgrammes = None
+        self._programmes = LRUCache(PROGRAMME_CACHE_SIZE)
+        self._recordings = LRUCache(RECORDING_CACHE_SIZE)
+        self._scheduleWarnAfter = 0
+
+    @_timed("setupDevice")
+    async def async_setupDevice(self):
+        """Set the remote up."""
+        deviceInfo = await self.getDeviceInformation()
+        if not deviceInfo:
+            return
+
+        self._soapControlURL = None
+        services = {}
+        for descriptionIndex in range(UPNP_DESCRIPTION_MAX):
+            description = await self._async_getDescription(descriptionIndex)
+            if description is None:
+                # Descriptions are numbered consecutively once they start
+                if SKY_PLAY_URN in services:
+                    break
+                continue
+            services.update(_findServices(description))
+            if SKY_PLAY_URN in services and SKY_BROWSE_URN in services:
+                break
+
+        playService = services.get(SKY_PLAY_URN)
+        if playService:
+            self._soapControlURL = SOAP_CONTROL_BASE_URL.format(
+                self.host, playService["controlURL"]
+            )
+            self.eventSubURL = SOAP_CONTROL_BASE_URL.format(
+                self.host, playService["eventSubURL"]
+            )
+        browseService = services.get(SKY_BROWSE_URN)
+        if browseService:
+            self.browseEventSubURL = SOAP_CONTROL_BASE_URL.format(
+                self.host, browseService["eventSubURL"]
+            )
+
+        self.deviceSetup = True
+
+    def setOverrides(self, overrideCountry=None, test_channel=None):
+        """Override various items."""
+        if overrideCountry:
+            self._overrideCountry = overrideCountry
+        if test_channel:
+            self._test_channel = test_channel
+
+    @_timed("powerStatus")
+    async def powerStatus(self) -> str:
+        """Get the power status of the Sky Q box."""
+        if not self.deviceSetup:
+            await self.async_setupDevice()
+
+        if self._soapControlURL is None:
+            return SKY_STATE_OFF
+
+        output = await self._async_retrieveInformation(REST_PATH_SYSTEMINFO)
+        if output is None:
+            return SKY_STATE_OFF
+        if "activeStandby" in output and output["activeStandby"] is True:
+            return SKY_STATE_STANDBY
+
+        return SKY_STATE_ON
+
+    @_timed("getCurrentState")
+    async def getCurrentState(self, powerStatus=None):
+        """Get current state of the SkyQ box.
+
+        Pass in the power status if it is already known, to save asking again.
+        """
+        if not powerStatus:
+            powerStatus = await self.powerStatus()
+        if powerStatus != SKY_STATE_ON:
+            return powerStatus
+
+        response = await self._async_callSkySOAPService(UPNP_GET_TRANSPORT_INFO)
+        if response is not None:
+            state = response.get(CURRENT_TRANSPORT_STATE)
+            if state == SKY_STATE_PLAYING:
+                return SKY_STATE_PLAYING
+            if state == SKY_STATE_PAUSED:
+                return SKY_STATE_PAUSED
+        return SKY_STATE_STANDBY
+
+    @_timed("getActiveApplication")
+    async def getActiveApplication(self):
+        """Get the active application on Sky Q box."""
+        try:
+            apps = await asyncio.wait_for(
+                self._async_callSkyWebSocket(WS_CURRENT_APPS), self.callTimeout
+            )
+            self._currentApp = next(
+                a for a in apps["apps"] if a["status"] == APP_STATUS_VISIBLE
+            )["appId"]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _callFailed()
+            _LOGGER.debug(f"Websocket call failed: {self.host} : {err}")
+        except (KeyError, StopIteration, TypeError, ValueError) as err:
+            _LOGGER.debug(f"Websocket returned no active app: {self.host} : {err}")
+
+        return self._currentApp
+
+    @_timed("getCurrentMedia")
+    async def getCurrentMedia(self):
+        """Get the currently playing media on the SkyQ box."""
+        channel = None
+        imageUrl = None
+        sid = None
+        pvrId = None
+        live = False
+
+        response = await self._async_callSkySOAPService(UPNP_GET_MEDIA_INFO)
+        if response is not None:
+            currentURI = response.get(CURRENT_URI)
+            if currentURI is not None:
+                if XSI in currentURI:
+                    # Live content
+                    sid = int(currentURI[6:], 16)
+
+                    if self._test_channel:
+                        sid = self._test_channel
+
+                    live = True
+                    channelNode = await self._async_getChannelNode(sid)
+                    if channelNode:
+                        channel = channelNode["channel"]
+                        imageUrl = await self._async_buildChannelUrl(sid, channel)
+                elif PVR in currentURI:
+                    # Recorded content
+                    pvrId = "P" + currentURI[11:]
+                    live = False
+
+        return Media(channel, imageUrl, sid, pvrId, live)
+
+    @_timed("getCurrentLiveTVProgramme")
+    async def getCurrentLiveTVProgramme(self, sid):
+        """Get current live programme on the specified channel."""
+        queryDate = datetime.utcnow()
+        # The programme stays current until it ends, so no need to ask the EPG again
+        programme = self._programmes.get(sid)
+        if programme and programme.starttime <= queryDate <= programme.endtime:
+            return programme
+
+        try:
+            programmes = await self._async_getEpgProgrammes(sid, queryDate)
+            programme = next(
+                (
+                    p
+                    for p in programmes
+                    if p.starttime <= queryDate and p.endtime >= queryDate
+                ),
+                None,
+            )
+            if programme:
+                self._programmes.set(sid, programme)
+            return programme
+        except Exception as err:
+            _callFailed()
+            _LOGGER.exception(f"X0010C - Error occurred: {self.host} : {sid} : {err}")
+            return None
+
+    @_timed("getSchedule")
+    async def getSchedule(self, sid, channelno, day):
+        """Get the programmes of a channel for a day, from the EPG.
+
+        The day is a datetime, as some countries use its time as well.
+        """
+        try:
+            remoteCountry = await self._async_getRemoteCountry()
+            return await self._executor.async_run(
+                remoteCountry.getEpgData, sid, channelno, day
+            )
+        except Exception as err:
+            _callFailed()
+            # A whole refresh of failures is likely, so don't flood the log
+            if time.monotonic() >= self._scheduleWarnAfter:
+                self._scheduleWarnAfter = time.monotonic() + EPG_WARNING_INTERVAL
+                _LOGGER.warning(
+                    f"W0030C - Schedule retrieval failed: {self.host} : {sid} : {err}"
+                )
+            else:
+                _LOGGER.debug(f"Schedule retrieval failed: {self.host} : {sid} : {err}")
+            return None
+
+    async def getChannelNodes(self, channelNames):
+        """Get the service id and number of each of the named channels the box has."""
+        if not self._channels:
+            self._channels = await self._async_getChannels()
+
+        nodes = {}
+        for channelNode in self._channels:
+            if channelNode["t"] in channelNames:
+                nodes.setdefault(channelNode["t"], channelNode)
+        return [(int(node["sid"]), node["c"]) for node in nodes.values()]
+
+    @_timed("getRecording")
+    async def getRecording(self, pvrId):
+        """Get the recording details."""
+        # Recording details do not change, until the recordings themselves do
+        cached = self._recordings.get(pvrId)
+        if cached:
+            return cached
+
+        season = None
+        episode = None
+        programmeuuid = None
+        imageUrl = None
+
+        resp = await self._async_retrieveInformation(
+            REST_RECORDING_DETAILS.format(pvrId)
+        )
+        if not resp or "details" not in resp:
+            _LOGGER.info(f"I0010C - Recording data not found for {pvrId}")
+            return None
+
+        recording = resp["details"]
+
+        channel = recording["cn"]
+        title = recording["t"]
+        if "seasonnumber" in recording and "episodenumber" in recording:
+            season = recording["seasonnumber"]
+            episode = recording["episodenumber"]
+        if "programmeuuid" in recording:
+            programmeuuid = recording["programmeuuid"]
+            remoteCountry = await self._async_getRemoteCountry()
+            imageUrl = remoteCountry.pvr_image_url.format(str(programmeuuid))
+        elif "osid" in recording:
+            sid = str(recording["osid"])
+            imageUrl = await self._async_buildChannelUrl(sid, channel)
+
+        starttime = datetime.utcfromtimestamp(recording["ast"])
+        if "finald" in recording:
+            endtime = datetime.utcfromtimestamp(recording["ast"] + recording["finald"])
+        elif "schd" in recording:
+            endtime = datetime.utcfromtimestamp(recording["ast"] + recording["schd"])
+        else:
+            endtime = starttime
+
+        recordedProgramme = RecordedProgramme(
+            programmeuuid, starttime, endtime, title, season, episode, imageUrl, channel
+        )
+        self._recordings.set(pvrId, recordedProgramme)
+        return recordedProgramme
+
+    def clearRecordings(self):
+        """Forget cached recording details after the box's recordings change."""
+        self._recordings.clear()
+
+    @_timed("getDeviceInformation")
+    async def getDeviceInformation(self):
+        """Get the device information from the SkyQ box."""
+        deviceInfo, systemInfo = await asyncio.gather(
+            self._async_retrieveInformation(REST_PATH_DEVICEINFO),
+            self._async_retrieveInformation(REST_PATH_SYSTEMINFO),
+        )
+        if not deviceInfo or not systemInfo:
+            return None
+
+        countryCode = deviceInfo["countryCode"]
+        if self._overrideCountry:
+            epgCountryCode = self._overrideCountry
+        else:
+            epgCountryCode = countryCode.upper()
+        if not epgCountryCode:
+            _LOGGER.error(f"E0010C - No country identified: {self.host}")
+            return None
+
+        if epgCountryCode in KNOWN_COUNTRIES:
+            epgCountryCode = KNOWN_COUNTRIES[epgCountryCode]
+
+        if epgCountryCode != self._epgCountryCode:
+            self._remoteCountry = None
+        self._epgCountryCode = epgCountryCode
+
+        return Device(
+            deviceInfo["ASVersion"],
+            deviceInfo["IPAddress"],
+            countryCode,
+            epgCountryCode,
+            systemInfo["hardwareModel"],
+            deviceInfo["hardwareName"],
+            systemInfo["manufacturer"],
+            deviceInfo["modelNumber"],
+            deviceInfo["serialNumber"],
+            deviceInfo["versionNumber"],
+        )
+
+    @_timed("getChannelList")
+    async def getChannelList(self):
+        """Get Channel list for Sky Q box."""
+        channels = await self._async_getChannels()
+        if not channels:
+            return None
+        self._channels = channels
+
+        channelitems = set()
+        for c in channels:
+            channelitems.add(Channel(c["c"], c["t"], sf=c["sf"]))
+
+        channelnosorted = sorted(channelitems, key=attrgetter("channelno"))
+        return ChannelList(
+            sorted(channelnosorted, key=attrgetter("channeltype"), reverse=True)
+        )
+
+    @_timed("press")
+    async def press(self, sequence):
+        """Issue the specified sequence of commands to SkyQ box."""
+        codes = []
+        if isinstance(sequence, list):
+            for item in sequence:
+                if item.casefold() not in self.commands:
+                    _LOGGER.error(f"E0020C - Invalid command: {self.host} : {item}")
+                    break
+                codes.append(self.commands[item.casefold()])
+        else:
+            if sequence not in self.commands:
+                _LOGGER.error(f"E0030C - Invalid command: {self.host} : {sequence}")
+            else:
+                codes.append(self.commands[sequence.casefold()])
+
+        if codes and not await self._remoteControl.async_press(codes):
+            _callFailed()
+
+    async def async_close(self):
+        """Close the connections held open to the box."""
+        await self._remoteControl.async_close()
+
+    async def _async_httpJson(self, path):
+        async with self._websession.get(
+            REST_BASE_URL.format(self.host, self.jsonPort, path),
+            timeout=self.callTimeout,
+        ) as response:
+            if response.status != 200:
+                _callFailed()
+                return None
+            return json.loads(await response.text())
+
+    async def _async_retrieveInformation(self, rest_path):
+        try:
+            return await self._async_httpJson(rest_path)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            _callFailed()
+            return None
+        except Exception as err:
+            _callFailed()
+            _LOGGER.exception(f"X0020C - Error occurred: {self.host} : {err}")
+            return None
+
+    async def _async_callSkyWebSocket(self, method):
+        url = WS_BASE_URL.format(self.host, method)
+        async with self._websession.ws_connect(url) as websock:
+            return await websock.receive_json()
+
+    async def _async_getDescription(self, descriptionIndex):
+        descriptionUrl = SOAP_DESCRIPTION_BASE_URL.format(self.host, descriptionIndex)
+        headers = {"User-Agent": SOAP_USER_AGENT}
+        try:
+            async with self._websession.get(
+                descriptionUrl, headers=headers, timeout=self.callTimeout
+            ) as response:
+                if response.status != 200:
+                    return None
+                return await response.text()
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                f"W0010C - Control URL not accessible: {self.host} : {descriptionUrl}"
+            )
+            return None
+        except aiohttp.ClientError as err:
+            _LOGGER.debug(f"Description not accessible: {descriptionUrl} : {err}")
+            return None
+
+    async def _async_callSkySOAPService(self, method):
+        if self._soapControlURL is None:
+            return None
+
+        headers = {
+            "Content-Type": 'text/xml; charset="utf-8"',
+            "SOAPACTION": SOAP_ACTION.format(method),
+        }
+        try:
+            async with self._websession.post(
+                self._soapControlURL,
+                headers=headers,
+                data=SOAP_PAYLOAD.format(method),
+                timeout=self.callTimeout,
+            ) as response:
+                if response.status != 200:
+                    _callFailed()
+                    return None
+                xml = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            _callFailed()
+            return None
+
+        return _parseSoapResponse(xml, method)
+
+    async def _async_getEpgProgrammes(self, sid, queryDate):
+        epg = f"{str(sid)} {queryDate.strftime('%Y%m%d')}"
+        if self._lastEpg == epg:
+            return self._lastEpgProgrammes
+
+        channelNode = await self._async_getChannelNode(sid)
+        if not channelNode:
+            return []
+
+        remoteCountry = await self._async_getRemoteCountry()
+        programmes = await self._executor.async_run(
+            remoteCountry.getEpgData, sid, channelNode["channelno"], queryDate
+        )
+        self._lastEpg = epg
+        self._lastEpgProgrammes = sorted(programmes)
+        return self._lastEpgProgrammes
+
+    async def _async_getRemoteCountry(self):
+        if not self._remoteCountry:
+            # Some countries load reference data when created, so not on the loop
+            self._remoteCountry = await self._executor.async_run(
+                _createCountry, self._epgCountryCode
+            )
+        return self._remoteCountry
+
+    async def _async_buildChannelUrl(self, sid, channel):
+        chid = "".join(e for e in channel.casefold() if e.isalnum())
+        remoteCountry = await self._async_getRemoteCountry()
+        return remoteCountry.channel_image_url.format(sid, chid)
+
+    async def _async_getChannelNode(self, sid):
+        channelNode = self._getNodeFromChannels(sid)
+
+        if not channelNode:
+            # Load the channel list for the first time.
+            # It's also possible the channels may have changed since last HA restart, so reload them
+            self._channels = await self._async_getChannels()
+            channelNode = self._getNodeFromChannels(sid)
+            if not channelNode:
+                return None
+
+        return {"channel": channelNode["t"], "channelno": channelNode["c"]}
+
+    async def _async_getChannels(self):
+        # This is here because otherwise I can never validate code for a foreign device
+        if self._test_channel:
+            return TEST_CHANNEL_LIST
+        channels = await self._async_retrieveInformation(REST_CHANNEL_LIST)
+        if channels:
+            return channels["services"]
+
+        return []
+
+    def _getNodeFromChannels(self, sid):
+        return next((s for s in self._channels if s["sid"] == str(sid)), None)
+
+
+def _findServices(description):
+    """Find the Sky services of interest in a UPnP device description."""
+    try:
+        root = ET.fromstring(description)
+    except ET.ParseError:
+        return {}
+
+    services = {}
+    for service in root.iter():
+        if _localName(service.tag) == "service":
+            serviceId = _findText(service, "serviceId")
+            if serviceId in (SKY_PLAY_URN, SKY_BROWSE_URN):
+                services[serviceId] = {
+                    "controlURL": _findText(service, "controlURL"),
+                    "eventSubURL": _findText(service, "eventSubURL"),
+                }
+
+    return services
+
+
+def _parseSoapResponse(xml, method):
+    """Convert a SOAP response body into a dictionary of its values."""
+    try:
+        root = ET.fromstring(xml)
+    except ET.ParseError:
+        return None
+
+    responseName = f"{method}Response"
+    for element in root.iter():
+        if _localName(element.tag) == responseName:
+            return {_localName(child.tag): child.text for child in element}
+
+    return None
+
+
+def _findText(element, name):
+    for child in element.iter():
+        if _localName(child.tag) == name:
+            return child.text
+    return None
+
+
+def _localName(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _createCountry(epgCountryCode):
+    return _importCountry(epgCountryCode)()
+
+
+def _importCountry(epgCountryCode):
+    try:
+        country = pycountry.countries.get(alpha_3=epgCountryCode).alpha_2.casefold()
+        SkyQCountry = importlib.import_module(
+            "pyskyqremote.country.remote_" + country
+        ).SkyQCountry
+
+    except (AttributeError, ModuleNotFoundError) as err:
+        _LOGGER.warning(
+            f"W0020C - Invalid country, defaulting to GBR : {epgCountryCode} : {err}"
+        )
+
+        from pyskyqremote.country.remote_gb import SkyQCountry
+
+    return SkyQCountry
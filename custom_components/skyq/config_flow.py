@@ -8,16 +8,17 @@ from operator import attrgetter
 import pycountry
 import voluptuous as vol
 from pyskyqremote.const import KNOWN_COUNTRIES
-from pyskyqremote.skyq_remote import SkyQRemote
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant import config_entries, exceptions
 from homeassistant.const import CONF_HOST, CONF_NAME
 from homeassistant.core import callback
 
+from .client import AsyncSkyQRemote
 from .const import (
-    CHANNEL_DISPLAY,
     CHANNEL_SOURCES_DISPLAY,
+    CONF_CACHE_IMAGES,
+    CONF_CALL_TIMEOUT,
     CONF_CHANNEL_SOURCES,
     CONF_COUNTRY,
     CONF_GEN_SWITCH,
@@ -25,12 +26,17 @@ from .const import (
     CONF_OUTPUT_PROGRAMME_IMAGE,
     CONF_ROOM,
     CONF_SOURCES,
+    CONF_UNAVAILABLE_AFTER,
+    CONF_UPDATE_BUDGET,
     CONF_VOLUME_ENTITY,
     CONST_DEFAULT,
+    COORDINATOR,
     DOMAIN,
-    SKYQREMOTE,
+    TIMEOUT,
+    UNAVAILABLE_AFTER,
+    UPDATE_BUDGET,
 )
-from .schema import DATA_SCHEMA
+from .schema import DATA_SCHEMA, FAILURES_SCHEMA, SECONDS_SCHEMA
 from .utils import convert_sources_JSON
 
 SORT_CHANNELS = False
@@ -86,10 +92,11 @@ class SkyqConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
     async def _async_setUniqueID(self, host):
-        remote = await self.hass.async_add_executor_job(SkyQRemote, host)
+        remote = AsyncSkyQRemote(self.hass, host)
+        await remote.async_setupDevice()
         if not remote.deviceSetup:
             raise CannotConnect()
-        deviceInfo = await self.hass.async_add_executor_job(remote.getDeviceInformation)
+        deviceInfo = await remote.getDeviceInformation()
         await self.async_set_unique_id(
             deviceInfo.countryCode
             + "".join(e for e in deviceInfo.serialNumber.casefold() if e.isalnum())
@@ -104,7 +111,7 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
         """Initialize Sky Q options flow."""
         self._name = config_entry.title
         self._config_entry = config_entry
-        self._remote = None
+        self._coordinator = None
         self._channel_sources = config_entry.options.get(CONF_CHANNEL_SOURCES, [])
 
         self._sources = convert_sources_JSON(
@@ -121,12 +128,22 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
         self._output_programme_image = config_entry.options.get(
             CONF_OUTPUT_PROGRAMME_IMAGE, True
         )
+        self._cache_images = config_entry.options.get(CONF_CACHE_IMAGES, False)
+        self._call_timeout = config_entry.options.get(CONF_CALL_TIMEOUT, TIMEOUT)
+        self._update_budget = config_entry.options.get(
+            CONF_UPDATE_BUDGET, UPDATE_BUDGET
+        )
+        self._unavailable_after = config_entry.options.get(
+            CONF_UNAVAILABLE_AFTER, UNAVAILABLE_AFTER
+        )
         self._channelDisplay = []
-        self._channel_list = []
+        self._channelIndex = None
 
     async def async_step_init(self, user_input=None):
         """Set up the option flow."""
-        self._remote = self.hass.data[DOMAIN][self._config_entry.entry_id][SKYQREMOTE]
+        self._coordinator = self.hass.data[DOMAIN][self._config_entry.entry_id][
+            COORDINATOR
+        ]
 
         s = set(KNOWN_COUNTRIES[country] for country in KNOWN_COUNTRIES)
         countryNames = []
@@ -136,27 +153,17 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
 
         self._country_list = [CONST_DEFAULT] + sorted(countryNames)
 
-        if self._remote.deviceSetup:
-            channelData = await self.hass.async_add_executor_job(
-                self._remote.getChannelList
-            )
-            self._channel_list = channelData.channels
+        # Stored channels are used even if the box is off; only without them is it asked
+        self._channelIndex = await self._coordinator.async_getChannelIndex()
 
-            for channel in self._channel_list:
-                self._channelDisplay.append(
-                    CHANNEL_DISPLAY.format(channel.channelno, channel.channelname)
-                )
+        if self._channelIndex:
+            self._channelDisplay = self._channelIndex.displayNames
 
             self._channel_sources_display = []
             for channel in self._channel_sources:
-                channelData = next(
-                    c for c in self._channel_list if c.channelname == channel
-                )
-                self._channel_sources_display.append(
-                    CHANNEL_DISPLAY.format(
-                        channelData.channelno, channelData.channelname
-                    )
-                )
+                channelDisplay = self._channelIndex.getDisplay(channel)
+                if channelDisplay:
+                    self._channel_sources_display.append(channelDisplay)
 
             return await self.async_step_user()
 
@@ -171,14 +178,10 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
             user_input.pop(CHANNEL_SOURCES_DISPLAY)
             if len(self._channel_sources_display) > 0:
 
-                channelitems = []
-                for channel in self._channel_sources_display:
-                    channelData = next(
-                        c
-                        for c in self._channel_list
-                        if channel == CHANNEL_DISPLAY.format(c.channelno, c.channelname)
-                    )
-                    channelitems.append(channelData)
+                channelitems = [
+                    self._channelIndex.getByDisplay(channel)
+                    for channel in self._channel_sources_display
+                ]
 
                 if SORT_CHANNELS:
                     channelnosorted = sorted(channelitems, key=attrgetter("channelno"))
@@ -198,6 +201,10 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
             self._gen_switch = user_input.get(CONF_GEN_SWITCH)
             self._live_tv = user_input.get(CONF_LIVE_TV)
             self._output_programme_image = user_input.get(CONF_OUTPUT_PROGRAMME_IMAGE)
+            self._cache_images = user_input.get(CONF_CACHE_IMAGES)
+            self._call_timeout = user_input.get(CONF_CALL_TIMEOUT)
+            self._update_budget = user_input.get(CONF_UPDATE_BUDGET)
+            self._unavailable_after = user_input.get(CONF_UNAVAILABLE_AFTER)
             self._room = user_input.get(CONF_ROOM)
             self._volume_entity = user_input.get(CONF_VOLUME_ENTITY)
             self._country = user_input.get(CONF_COUNTRY)
@@ -233,6 +240,7 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_OUTPUT_PROGRAMME_IMAGE,
                         default=self._output_programme_image,
                     ): bool,
+                    vol.Optional(CONF_CACHE_IMAGES, default=self._cache_images): bool,
                     vol.Optional(CONF_LIVE_TV, default=self._live_tv): bool,
                     vol.Optional(CONF_GEN_SWITCH, default=self._gen_switch): bool,
                     vol.Optional(
@@ -248,6 +256,15 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Optional(
                         CONF_SOURCES, description={"suggested_value": self._sources}
                     ): str,
+                    vol.Optional(
+                        CONF_CALL_TIMEOUT, default=self._call_timeout
+                    ): SECONDS_SCHEMA,
+                    vol.Optional(
+                        CONF_UPDATE_BUDGET, default=self._update_budget
+                    ): SECONDS_SCHEMA,
+                    vol.Optional(
+                        CONF_UNAVAILABLE_AFTER, default=self._unavailable_after
+                    ): FAILURES_SCHEMA,
                 }
             ),
             errors=errors,
@@ -272,7 +289,7 @@ class SkyQOptionsFlowHandler(config_entries.OptionsFlow):
     def _validate_commands(self, source):
         commands = source[1].split(",")
         for command in commands:
-            if command not in SkyQRemote.commands:
+            if command not in AsyncSkyQRemote.commands:
                 raise InvalidCommand()
 
 
@@ -4,7 +4,14 @@ from homeassistant.const import STATE_OFF, STATE_UNKNOWN
 
 DOMAIN = "skyq"
 SKYQREMOTE = "skyqremote"
+COORDINATOR = "coordinator"
+APP_IMAGES = "app_images"
+IMAGE_CACHE = "image_cache"
+CALL_STATS = "call_stats"
+STARTUP = "startup"
+EXECUTOR = "executor"
 UNDO_UPDATE_LISTENER = "undo_update_listener"
+START_TASK = "start_task"
 
 CONF_SOURCES = "sources"
 CONF_CHANNEL_SOURCES = "channel_sources"
@@ -12,15 +19,23 @@ CONF_ROOM = "room"
 CONF_DIR = "config_directory"
 CONF_GEN_SWITCH = "generate_switches_for_channels"
 CONF_OUTPUT_PROGRAMME_IMAGE = "output_programme_image"
+CONF_CACHE_IMAGES = "cache_images"
 CONF_LIVE_TV = "live_tv"
 CONF_COUNTRY = "country"
 CONF_TEST_CHANNEL = "test_channel"
 CONF_VOLUME_ENTITY = "volume_entity"
+CONF_STARTUP_CONCURRENCY = "startup_concurrency"
+CONF_CALL_TIMEOUT = "call_timeout"
+CONF_UPDATE_BUDGET = "update_budget"
+CONF_UNAVAILABLE_AFTER = "unavailable_after"
 CHANNEL_SOURCES_DISPLAY = "channel_sources_display"
 CHANNEL_DISPLAY = "{0} - {1}"
 
 CONST_DEFAULT_ROOM = "Default Room"
 CONST_SKYQ_MEDIA_TYPE = "skyq_media_type"
+CONST_UPDATE_INTERVAL = "update_interval"
+CONST_STATE_RETRIEVED = "state_retrieved"
+CONST_DIAGNOSTICS = "diagnostics"
 CONST_DEFAULT = "Default"
 
 DEVICE_CLASS = "tv"
@@ -29,8 +44,51 @@ FEATURE_BASIC = 1
 FEATURE_IMAGE = 2
 FEATURE_LIVE_TV = 4
 FEATURE_SWITCHES = 8
+FEATURE_IMAGE_CACHE = 16
 
 TIMEOUT = 2
+UPDATE_BUDGET = 8
+UNAVAILABLE_AFTER = 3
+STARTUP_CONCURRENCY = 4
+STARTUP_STORAGE_KEY = "skyq.startup"
+STARTUP_STORAGE_VERSION = 1
+STARTUP_SAVE_DELAY = 10
+EXECUTOR_THREADS_PER_BOX = 2
+EXECUTOR_MIN_THREADS = 2
+EXECUTOR_MAX_THREADS = 16
+KEY_INTERVAL = 0.5
+REMOTE_IDLE_TIMEOUT = 30
+REMOTE_REUSE_CHECK = 0.1
+REFRESH_COOLDOWN = 1
+CALL_STATS_WINDOW = 200
+PROGRAMME_CACHE_SIZE = 20
+EPG_DAYS = 2
+EPG_REFRESH_INTERVAL = 3600
+EPG_WARNING_INTERVAL = 3600
+RECORDING_CACHE_SIZE = 20
+
+CHANNEL_STORAGE_KEY = "skyq.channels.{0}"
+CHANNEL_STORAGE_VERSION = 1
+CHANNEL_STORAGE_TTL = 86400
+
+POLL_FAST_INTERVAL = 2
+POLL_FAST_WINDOW = 20
+COMMAND_SETTLE_DELAY = 3
+POLL_BACKOFF_MAX = 120
+PROGRAMME_BOUNDARY_DELAY = 5
+
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BACKOFF_MIN = 10
+BREAKER_BACKOFF_MAX = 300
+BREAKER_PROBE_TIMEOUT = 1
+
+EVENT_FALLBACK_INTERVAL = 120
+EVENT_RESUBSCRIBE_INTERVAL = 60
+EVENT_SUBSCRIPTION_TIMEOUT = 300
+EVENT_WS_RETRY_MIN = 5
+EVENT_WS_RETRY_MAX = 300
+UPNP_DESCRIPTION_MAX = 50
+SKY_BROWSE_URN = "urn:nds-com:serviceId:SkyBrowse"
 
 SKYQ_APP = "app"
 SKYQ_LIVE = "live"
@@ -49,3 +107,8 @@ APP_TITLES = {
     "com.bskyb.epgui": "EPG",
 }
 APP_IMAGE_URL_BASE = "/local/community/skyq/{0}.png"
+APP_IMAGE_DIRECTORY = ("www", "community", "skyq")
+APP_IMAGE_SCAN_INTERVAL = 60
+IMAGE_CACHE_DIRECTORY = (".cache", "skyq")
+IMAGE_CACHE_MAX_SIZE = 50 * 1024 * 1024
+IMAGE_THUMBNAIL_SIZE = (640, 360)
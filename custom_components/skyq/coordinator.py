@@ -0,0 +1,470 @@
+"""Coordinator retrieving the state of a Sky Q box for its entities."""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+from pyskyqremote.const import APP_EPG, SKY_STATE_OFF, SKY_STATE_ON
+
+import homeassistant.util.dt as dt_util
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .classes.boxstate import BoxState
+from .classes.channelindex import ChannelIndex
+from .circuitbreaker import SkyQCircuitBreaker
+from .const import (
+    CHANNEL_STORAGE_TTL,
+    COMMAND_SETTLE_DELAY,
+    EVENT_FALLBACK_INTERVAL,
+    FEATURE_LIVE_TV,
+    POLL_BACKOFF_MAX,
+    POLL_FAST_INTERVAL,
+    POLL_FAST_WINDOW,
+    PROGRAMME_BOUNDARY_DELAY,
+    REFRESH_COOLDOWN,
+)
+from .epg import SkyQEpg
+from .events import SkyQEventListener
+from .schema import SCAN_INTERVAL
+from .storage import SkyQChannelStore
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SkyQCoordinator(DataUpdateCoordinator):
+    """Poll, or listen to, a Sky Q box once for all of its entities."""
+
+    def __init__(self, hass, remote, config, scan_interval=SCAN_INTERVAL):
+        """Initialise the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=remote.host,
+            update_interval=scan_interval,
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=True
+            ),
+        )
+        self.remote = remote
+        self.remote.callTimeout = config.call_timeout
+        self.config = config
+        self.deviceInfo = None
+        self._channelIndex = None
+        self._channelStore = None
+        self._channelsRetrieved = None
+        self._channelsRevalidating = False
+        self._channelsLoaded = False
+        self._scanInterval = scan_interval
+        self.pollInterval = scan_interval.total_seconds()
+        self._idleInterval = None
+        self._pollFastUntil = 0
+        self._unsubSettle = None
+        self.settling = False
+        self._circuitBreaker = SkyQCircuitBreaker(remote.host, remote.jsonPort)
+        self._refreshing = False
+        self._refreshPending = False
+        self._refreshCount = 0
+        self._refreshCoalesced = 0
+        self._eventListener = SkyQEventListener(
+            hass, remote, self._handleEvent, self._handleRecordingsChanged
+        )
+        self._epg = SkyQEpg(
+            hass,
+            remote,
+            config.channel_sources if config.enabled_features & FEATURE_LIVE_TV else [],
+        )
+        self._unsubStop = None
+        self._started = False
+        self._stopped = False
+        self._backgroundStarted = False
+        self._details = None
+        self._budgetSpent = 0
+        self._failures = 0
+        self._retrieved = None
+
+    async def async_start(self):
+        """Set the box up, then subscribe to its events and fetch its schedules.
+
+        Returns whether the box could be set up. The entry may be unloaded
+        whilst this is waiting on the box, in which case it goes no further.
+        """
+        if self._stopped:
+            return False
+        self._unsubStop = self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_handleStop
+        )
+        await self.async_refresh()
+        if self._stopped:
+            return False
+        self._started = True
+        await self._async_startBackground()
+        return self.remote.deviceSetup and not self._stopped
+
+    async def async_stop(self):
+        """Unsubscribe from box events."""
+        self._stopped = True
+        if self._unsubStop:
+            self._unsubStop()
+            self._unsubStop = None
+        if self._unsubSettle:
+            self._unsubSettle()
+            self._unsubSettle = None
+        self._started = False
+        self._backgroundStarted = False
+        self._epg.stop()
+        await self._eventListener.async_stop()
+        await self.remote.async_close()
+
+    async def async_refresh(self):
+        """Refresh the box state, folding requests made meanwhile into one more."""
+        if hasattr(DataUpdateCoordinator, "_async_refresh"):
+            # Folded in _async_refresh, which scheduled refreshes call directly
+            await super().async_refresh()
+        else:
+            await self._async_coalesceRefresh(super().async_refresh)
+
+    async def _async_refresh(self, *args, **kwargs):
+        """Refresh the box state, however asked for, on newer Home Assistant."""
+        await self._async_coalesceRefresh(super()._async_refresh, *args, **kwargs)
+
+    async def _async_coalesceRefresh(self, refresh, *args, **kwargs):
+        if self._refreshing:
+            # Whatever asked will see the refresh that follows the current one
+            self._refreshPending = True
+            self._refreshCoalesced += 1
+            return
+
+        self._refreshing = True
+        try:
+            self._refreshPending = True
+            while self._refreshPending:
+                self._refreshPending = False
+                self._refreshCount += 1
+                await refresh(*args, **kwargs)
+        finally:
+            self._refreshing = False
+
+    @property
+    def channelIndex(self):
+        """Indexed channel list, if it has been retrieved."""
+        return self._channelIndex
+
+    async def async_getChannelIndex(self):
+        """Get the indexed channel list, from storage if it was retrieved before."""
+        if not self._channelIndex:
+            await self._async_loadChannels()
+        if not self._channelIndex:
+            await self._async_retrieveChannels()
+        else:
+            self._revalidateChannels()
+        return self._channelIndex
+
+    def diagnostics(self):
+        """Describe how the box is being updated, and how its calls are performing."""
+        return {
+            "host": self.remote.host,
+            "update_interval": self.update_interval.total_seconds(),
+            "events_active": self._eventListener.active,
+            "channels": len(self._channelIndex) if self._channelIndex else None,
+            "circuit_breaker": self._circuitBreaker.summary(),
+            "refreshes": self._refreshCount,
+            "refreshes_coalesced": self._refreshCoalesced,
+            "update_budget_spent": self._budgetSpent,
+            "consecutive_failures": self._failures,
+            "state_retrieved": self._retrieved.isoformat() if self._retrieved else None,
+            "epg": self._epg.summary(),
+            "calls": self.remote.callStats.summary(),
+        }
+
+    def diagnosticsSummary(self):
+        """Summarise how the box's calls are doing, in values that rarely change.
+
+        Shown as an attribute, so kept to what won't add to the recorder with
+        every write; the latencies are in the diagnostics.
+        """
+        return {
+            "call_errors": self.remote.callStats.errors(),
+            "circuit_breaker_open": self._circuitBreaker.open,
+        }
+
+    async def _async_update_data(self):
+        deadline = self.hass.loop.time() + self.config.update_budget
+        # Started before the box settled after a command, so may not show its result
+        self.settling = self._unsubSettle is not None
+        if not self._channelsLoaded and len(self.config.channel_sources) > 0:
+            await self._async_loadChannels()
+
+        if await self._circuitBreaker.async_allowRequest():
+            try:
+                boxState = await self._async_getBoxStateIfSetUp(deadline)
+            except asyncio.TimeoutError:
+                # Counted as a failed update, so the last good state is kept
+                self._budgetSpent += 1
+                _LOGGER.debug(
+                    f"Update budget spent before the box answered: {self.name}"
+                )
+                boxState = BoxState(SKY_STATE_OFF)
+            self._circuitBreaker.recordResult(boxState.powerStatus != SKY_STATE_OFF)
+        else:
+            # Unreachable, so don't wait on full requests until it answers a probe
+            boxState = BoxState(SKY_STATE_OFF)
+
+        if self._started and not self._backgroundStarted and self.remote.deviceSetup:
+            # The box was unreachable at startup, but has now been set up
+            self.hass.async_create_task(self._async_startBackground())
+
+        self._setUpdateInterval(boxState)
+        return self._serveStale(boxState)
+
+    def stateRetrieved(self):
+        """Get when the state was retrieved, if the last updates failed."""
+        if not self._failures or not self._retrieved:
+            return None
+        return self._retrieved.isoformat()
+
+    def _serveStale(self, boxState):
+        """Serve the last good state through a few failed updates, rather than flap."""
+        if boxState.powerStatus != SKY_STATE_OFF:
+            self._failures = 0
+            self._retrieved = dt_util.utcnow()
+            return boxState
+
+        self._failures += 1
+        if (
+            self.data
+            and self.data.powerStatus != SKY_STATE_OFF
+            and self._failures < self.config.unavailable_after
+        ):
+            _LOGGER.debug(f"Update failed, keeping the last state: {self.name}")
+            return self.data
+        return boxState
+
+    async def _async_startBackground(self):
+        if self._backgroundStarted or self._stopped or not self.remote.deviceSetup:
+            return
+        self._backgroundStarted = True
+        self._epg.start()
+        await self._eventListener.async_start()
+        if self._stopped:
+            # Stopped whilst subscribing, so undo what the stop missed
+            self._epg.stop()
+            await self._eventListener.async_stop()
+
+    async def _async_getBoxStateIfSetUp(self, deadline):
+        if not self.deviceInfo:
+            await self._async_withinBudget(self._async_getDeviceInfo(), deadline)
+        if not self.deviceInfo:
+            return BoxState(SKY_STATE_OFF)
+
+        boxState = await self._async_getBoxState(deadline)
+        if self._channelIndex and boxState.powerStatus == SKY_STATE_ON:
+            self._revalidateChannels()
+        return boxState
+
+    async def _async_getBoxState(self, deadline):
+        powerStatus, currentState, app, media = await self._async_withinBudget(
+            self._async_getCoreState(), deadline
+        )
+        if powerStatus != SKY_STATE_ON:
+            return BoxState(powerStatus)
+
+        programme = None
+        recording = None
+        if app == APP_EPG and media:
+            programme, recording = await self._async_getMediaDetails(media, deadline)
+
+        return BoxState(powerStatus, currentState, app, media, programme, recording)
+
+    async def _async_getCoreState(self):
+        powerStatus = await self.remote.powerStatus()
+        if powerStatus != SKY_STATE_ON:
+            return powerStatus, None, None, None
+
+        currentState, app, media = await asyncio.gather(
+            self.remote.getCurrentState(powerStatus),
+            self.remote.getActiveApplication(),
+            self._async_getCurrentMedia(),
+        )
+        return powerStatus, currentState, app, media
+
+    async def _async_withinBudget(self, awaitable, deadline):
+        """Await within what is left of the update budget, else asyncio.TimeoutError."""
+        return await asyncio.wait_for(
+            awaitable, max(0, deadline - self.hass.loop.time())
+        )
+
+    async def _async_getMediaDetails(self, media, deadline):
+        """Get the programme or recording, within what is left of the budget."""
+        if media.live and self._epg.active:
+            programme = self._epg.getNow(media.sid)
+            if programme:
+                return programme, None
+
+        # A retrieval abandoned last time may still be running, so wait on that
+        key = (media.sid, media.pvrId)
+        if not self._details or self._details[0] != key or self._details[1].done():
+            task = self.hass.async_create_task(self._async_retrieveMediaDetails(media))
+            self._details = (key, task)
+        task = self._details[1]
+
+        await asyncio.wait([task], timeout=max(0, deadline - self.hass.loop.time()))
+        if task.done():
+            return task.result()
+
+        # Out of time, so go without, unless they are unchanged since last time.
+        # The retrieval carries on in the background, to be picked up next time.
+        self._budgetSpent += 1
+        _LOGGER.debug(f"Update budget spent, skipping media details: {self.name}")
+        lastMedia = self.data.media if self.data else None
+        if lastMedia and (lastMedia.sid, lastMedia.pvrId) == key:
+            return self.data.programme, self.data.recording
+        return None, None
+
+    async def _async_retrieveMediaDetails(self, media):
+        try:
+            if media.live and media.sid:
+                if self.config.enabled_features & FEATURE_LIVE_TV:
+                    programme = await self.remote.getCurrentLiveTVProgramme(media.sid)
+                    return programme, None
+            elif media.pvrId:
+                return None, await self.remote.getRecording(media.pvrId)
+        except Exception as err:
+            _LOGGER.exception(
+                f"X0010O - Current Media retrieval failed: {media} : {err}"
+            )
+        return None, None
+
+    async def _async_getCurrentMedia(self):
+        try:
+            return await self.remote.getCurrentMedia()
+        except Exception as err:
+            _LOGGER.exception(f"X0020O - Current Media retrieval failed: {err}")
+            return None
+
+    async def _async_getDeviceInfo(self):
+        self.remote.setOverrides(
+            self.config.overrideCountry, self.config.test_channel,
+        )
+        self.deviceInfo = await self.remote.getDeviceInformation()
+        if self.deviceInfo and len(self.config.channel_sources) > 0:
+            await self.async_getChannelIndex()
+
+    async def _async_loadChannels(self):
+        # Only read the store once, even if it held nothing; the sources can
+        # only change through the options, which sets the box up afresh
+        if self._channelsLoaded:
+            return
+        channelStore = self._getChannelStore()
+        if not channelStore:
+            return
+        self._channelsLoaded = True
+
+        channels, self._channelsRetrieved = await channelStore.async_load()
+        if channels:
+            self._channelIndex = ChannelIndex(channels)
+
+    async def _async_retrieveChannels(self):
+        channelData = await self.remote.getChannelList()
+        if not channelData:
+            return
+
+        self._channelIndex = ChannelIndex(channelData.channels)
+        self._channelsRetrieved = time.time()
+        channelStore = self._getChannelStore()
+        if channelStore:
+            await channelStore.async_save(channelData.channels)
+
+    def _revalidateChannels(self):
+        if (
+            self._channelsRevalidating
+            or time.time() - self._channelsRetrieved < CHANNEL_STORAGE_TTL
+        ):
+            return
+
+        self._channelsRevalidating = True
+        self.hass.async_create_task(self._async_revalidateChannels())
+
+    async def _async_revalidateChannels(self):
+        try:
+            await self._async_retrieveChannels()
+        finally:
+            self._channelsRevalidating = False
+
+    def _getChannelStore(self):
+        if not self._channelStore:
+            storeId = self.config.unique_id
+            if not storeId and self.deviceInfo:
+                storeId = self.deviceInfo.epgCountryCode + "".join(
+                    e for e in self.deviceInfo.serialNumber.casefold() if e.isalnum()
+                )
+            if storeId:
+                self._channelStore = SkyQChannelStore(self.hass, storeId)
+        return self._channelStore
+
+    def _setUpdateInterval(self, boxState):
+        scanInterval = self._scanInterval.total_seconds()
+        if boxState.powerStatus != SKY_STATE_ON:
+            # Nothing to see whilst off or in standby, so check less and less often
+            if self._idleInterval:
+                self._idleInterval = min(self._idleInterval * 2, POLL_BACKOFF_MAX)
+            else:
+                self._idleInterval = scanInterval
+            interval = max(self._idleInterval, scanInterval)
+        else:
+            self._idleInterval = None
+            if self._eventListener.active:
+                interval = EVENT_FALLBACK_INTERVAL
+            else:
+                interval = scanInterval
+
+        if time.monotonic() < self._pollFastUntil:
+            interval = min(interval, POLL_FAST_INTERVAL)
+        self.pollInterval = interval
+
+        if boxState.powerStatus == SKY_STATE_ON and boxState.programme:
+            # Programme changes are not evented, so catch the next one as it starts
+            programmeEnd = boxState.programme.endtime
+            untilEnd = (programmeEnd - datetime.utcnow()).total_seconds()
+            if untilEnd > 0:
+                interval = min(interval, untilEnd + PROGRAMME_BOUNDARY_DELAY)
+
+        self.update_interval = timedelta(seconds=interval)
+
+    @callback
+    def pollFast(self):
+        """Poll quickly for a while, as an update has been asked for."""
+        self._pollFastUntil = time.monotonic() + POLL_FAST_WINDOW
+
+    @callback
+    def refreshWhenSettled(self):
+        """Refresh once the box has settled after a command.
+
+        A further command before then puts the refresh back, so a burst of
+        commands is reconciled once.
+        """
+        self.settling = True
+        if self._unsubSettle:
+            self._unsubSettle()
+        self._unsubSettle = async_call_later(
+            self.hass, COMMAND_SETTLE_DELAY, self._async_handleSettled
+        )
+
+    async def _async_handleSettled(self, now):
+        self._unsubSettle = None
+        await self.async_request_refresh()
+
+    @callback
+    def _handleEvent(self):
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _handleRecordingsChanged(self):
+        self.remote.clearRecordings()
+
+    async def _async_handleStop(self, event):
+        self._unsubStop = None
+        await self.async_stop()
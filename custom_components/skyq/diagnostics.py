@@ -0,0 +1,14 @@
+"""Diagnostics support for Sky Q."""
+from .const import COORDINATOR, DOMAIN
+from .executor import getExecutor
+from .startup import async_getStartup
+
+
+async def async_get_config_entry_diagnostics(hass, config_entry):
+    """Return the diagnostics of the box of a config entry."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][COORDINATOR]
+    startup = await async_getStartup(hass)
+    diagnostics = coordinator.diagnostics()
+    diagnostics["init_time"] = startup.initTime(coordinator.remote.host)
+    diagnostics["executor"] = getExecutor(hass).summary()
+    return diagnostics
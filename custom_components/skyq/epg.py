@@ -0,0 +1,90 @@
+"""Background retrieval of the EPG schedules of a box's channel sources."""
+import logging
+from datetime import datetime, timedelta
+
+from homeassistant.helpers.event import async_track_time_interval
+
+from .classes.scheduleindex import ScheduleIndex
+from .const import EPG_DAYS, EPG_REFRESH_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SkyQEpg:
+    """Today's and tomorrow's schedules of the channel sources, held locally.
+
+    Schedules are fetched a day at a time, one channel after another, and
+    only for the days not already held. As the window rolls forward, finished
+    programmes are dropped and the new day fetched.
+    """
+
+    def __init__(self, hass, remote, channelNames):
+        """Initialise the EPG."""
+        self._hass = hass
+        self._remote = remote
+        self._channelNames = channelNames
+        self._index = ScheduleIndex()
+        self._unsubRefresh = None
+        self._refreshing = False
+
+    @property
+    def active(self):
+        """Whether schedules are being kept for the channels."""
+        return self._unsubRefresh is not None
+
+    def start(self):
+        """Fetch the schedules now, then keep them up to date."""
+        if self._unsubRefresh or not self._channelNames:
+            return
+        self._unsubRefresh = async_track_time_interval(
+            self._hass, self._async_refresh, timedelta(seconds=EPG_REFRESH_INTERVAL)
+        )
+        self._hass.async_create_task(self._async_refresh())
+
+    def stop(self):
+        """Stop keeping the schedules up to date."""
+        if self._unsubRefresh:
+            self._unsubRefresh()
+            self._unsubRefresh = None
+
+    def getNow(self, sid):
+        """Get the programme on now on the channel, if its schedule is held."""
+        return self._index.getNow(sid, datetime.utcnow())
+
+    def getNext(self, sid):
+        """Get the programme on next on the channel, if its schedule is held."""
+        return self._index.getNext(sid, datetime.utcnow())
+
+    def summary(self):
+        """Summarise the schedules held."""
+        return {"active": self.active, "programmes": len(self._index)}
+
+    async def _async_refresh(self, now=None):
+        if self._refreshing:
+            return
+        self._refreshing = True
+        try:
+            await self._async_fetchMissingDays()
+        finally:
+            self._refreshing = False
+
+    async def _async_fetchMissingDays(self):
+        now = datetime.utcnow()
+        self._index.prune(now)
+        today = datetime.combine(now.date(), datetime.min.time())
+        days = [today + timedelta(days=offset) for offset in range(EPG_DAYS)]
+
+        channels = await self._remote.getChannelNodes(self._channelNames)
+        fetched = 0
+        for sid, channelno in channels:
+            for day in days:
+                if self._index.hasDay(sid, day.date()) or not self.active:
+                    continue
+                programmes = await self._remote.getSchedule(sid, channelno, day)
+                if programmes:
+                    self._index.addDay(sid, day.date(), programmes)
+                    fetched += 1
+        if fetched:
+            _LOGGER.debug(
+                f"EPG schedules fetched: {self._remote.host} : {fetched} : {len(self._index)}"
+            )
@@ -0,0 +1,291 @@
+"""Event subscriptions for the Sky Q box."""
+import asyncio
+import logging
+import socket
+
+import aiohttp
+from aiohttp import web
+from pyskyqremote.const import WS_BASE_URL, WS_CURRENT_APPS
+
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    EVENT_RESUBSCRIBE_INTERVAL,
+    EVENT_SUBSCRIPTION_TIMEOUT,
+    EVENT_WS_RETRY_MAX,
+    EVENT_WS_RETRY_MIN,
+    TIMEOUT,
+)
+from .executor import getExecutor
+
+_LOGGER = logging.getLogger(__name__)
+
+METH_NOTIFY = "NOTIFY"
+METH_SUBSCRIBE = "SUBSCRIBE"
+METH_UNSUBSCRIBE = "UNSUBSCRIBE"
+
+
+class SkyQEventListener:
+    """Listen to the UPnP and websocket event streams of a Sky Q box."""
+
+    def __init__(self, hass, remote, update_callback, recordings_callback=None):
+        """Initialise the listener."""
+        self._hass = hass
+        self._executor = getExecutor(hass)
+        self._remote = remote
+        self._host = remote.host
+        self._update_callback = update_callback
+        self._recordings_callback = recordings_callback
+        self._websession = async_get_clientsession(hass)
+        self._runner = None
+        self._callbackUrl = None
+        self._playSubscription = None
+        self._browseSubscription = None
+        self._stopping = False
+        self._wsTask = None
+
+    @property
+    def active(self):
+        """Events are being received from the box."""
+        return bool(self._playSubscription and self._playSubscription.active)
+
+    async def async_start(self):
+        """Subscribe to the box events."""
+        self._stopping = False
+        if not self._remote.deviceSetup:
+            await self._remote.async_setupDevice()
+        if not self._remote.eventSubURL:
+            _LOGGER.info(
+                f"I0010V - Event subscription not supported, polling instead: {self._host}"
+            )
+            return False
+
+        try:
+            await self._async_startServer()
+        except OSError as err:
+            _LOGGER.warning(
+                f"W0010V - Event callback server failed to start: {self._host} : {err}"
+            )
+            return False
+
+        self._playSubscription = self._createSubscription(
+            self._remote.eventSubURL, self._notify
+        )
+        await self._playSubscription.async_subscribe()
+        if self._recordings_callback and self._remote.browseEventSubURL:
+            self._browseSubscription = self._createSubscription(
+                self._remote.browseEventSubURL, self._notifyRecordings
+            )
+            await self._browseSubscription.async_subscribe()
+
+        self._wsTask = self._hass.loop.create_task(self._async_watchApps())
+        return True
+
+    async def async_stop(self):
+        """Unsubscribe from the box events."""
+        self._stopping = True
+
+        if self._wsTask:
+            self._wsTask.cancel()
+            self._wsTask = None
+
+        for subscription in self._subscriptions:
+            await subscription.async_unsubscribe()
+        self._playSubscription = None
+        self._browseSubscription = None
+
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def _subscriptions(self):
+        return [s for s in (self._playSubscription, self._browseSubscription) if s]
+
+    def _createSubscription(self, eventSubUrl, event_callback):
+        return _EventSubscription(
+            self._hass,
+            self._websession,
+            self._host,
+            eventSubUrl,
+            self._callbackUrl,
+            event_callback,
+        )
+
+    async def _async_startServer(self):
+        localIp = await self._executor.async_run(_getLocalIp, self._host)
+
+        app = web.Application()
+        app.router.add_route(METH_NOTIFY, "/", self._async_handleNotify)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind((localIp, 0))
+        site = web.SockSite(self._runner, sock)
+        await site.start()
+        self._callbackUrl = f"http://{localIp}:{sock.getsockname()[1]}/"
+
+    async def _async_handleNotify(self, request):
+        sid = request.headers.get("SID")
+        subscription = next(
+            (s for s in self._subscriptions if s.sid and s.sid == sid), None
+        )
+        if not subscription:
+            return web.Response(status=412)
+
+        await request.read()
+        subscription.handleEvent(request.headers.get("SEQ"))
+        return web.Response()
+
+    async def _async_watchApps(self):
+        url = WS_BASE_URL.format(self._host, WS_CURRENT_APPS)
+        retry = EVENT_WS_RETRY_MIN
+        while not self._stopping:
+            try:
+                async with self._websession.ws_connect(url) as websock:
+                    initialStatus = True
+                    async for message in websock:
+                        if message.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        # The first message is the current status, not a change
+                        if initialStatus:
+                            initialStatus = False
+                            continue
+                        retry = EVENT_WS_RETRY_MIN
+                        self._notify()
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as err:
+                _LOGGER.debug(f"Application websocket closed: {self._host} : {err}")
+
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, EVENT_WS_RETRY_MAX)
+
+    @callback
+    def _notify(self, seq=None):
+        if not self._stopping:
+            self._update_callback()
+
+    @callback
+    def _notifyRecordings(self, seq):
+        # The initial event only reports the current recordings, not a change
+        if not self._stopping and seq != "0":
+            self._recordings_callback()
+
+
+class _EventSubscription:
+    """UPnP event subscription to one of the box services."""
+
+    def __init__(
+        self, hass, websession, host, eventSubUrl, callbackUrl, event_callback
+    ):
+        """Initialise the subscription."""
+        self._hass = hass
+        self._websession = websession
+        self._host = host
+        self._eventSubUrl = eventSubUrl
+        self._callbackUrl = callbackUrl
+        self._event_callback = event_callback
+        self._unsubRenew = None
+        self._stopping = False
+        self.sid = None
+        self.active = False
+
+    async def async_subscribe(self):
+        """Subscribe, retrying later if the box does not accept it."""
+        self._stopping = False
+        if not await self._async_subscribe():
+            self._scheduleRenew(EVENT_RESUBSCRIBE_INTERVAL)
+
+    async def async_unsubscribe(self):
+        """Cancel the subscription."""
+        self._stopping = True
+        self.active = False
+        if self._unsubRenew:
+            self._unsubRenew()
+            self._unsubRenew = None
+
+        if self.sid:
+            try:
+                async with self._websession.request(
+                    METH_UNSUBSCRIBE,
+                    self._eventSubUrl,
+                    headers={"SID": self.sid},
+                    timeout=TIMEOUT,
+                ):
+                    pass
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            self.sid = None
+
+    @callback
+    def handleEvent(self, seq):
+        """Handle an event notified for this subscription."""
+        # The box sends an initial event straight after subscription, so
+        # events are only relied upon once they have actually been seen.
+        self.active = True
+        self._event_callback(seq)
+
+    async def _async_subscribe(self):
+        if self.sid:
+            headers = {"SID": self.sid}
+        else:
+            headers = {"CALLBACK": f"<{self._callbackUrl}>", "NT": "upnp:event"}
+        headers["TIMEOUT"] = f"Second-{EVENT_SUBSCRIPTION_TIMEOUT}"
+
+        try:
+            async with self._websession.request(
+                METH_SUBSCRIBE, self._eventSubUrl, headers=headers, timeout=TIMEOUT
+            ) as response:
+                if response.status != 200:
+                    if self.sid:
+                        # Renewal rejected, so start a fresh subscription
+                        self.sid = None
+                        return await self._async_subscribe()
+                    self.active = False
+                    return False
+                self.sid = response.headers.get("SID")
+                timeout = _parseTimeout(response.headers.get("TIMEOUT"))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            if self.active:
+                _LOGGER.info(
+                    f"I0020V - Event subscription lost, polling instead: {self._host} : {err}"
+                )
+            self.sid = None
+            self.active = False
+            return False
+
+        self._scheduleRenew(max(timeout // 2, timeout - EVENT_RESUBSCRIBE_INTERVAL))
+        return True
+
+    def _scheduleRenew(self, delay):
+        if self._stopping:
+            return
+        # Only one renewal at a time, however the subscription came about
+        if self._unsubRenew:
+            self._unsubRenew()
+        self._unsubRenew = async_call_later(self._hass, delay, self._async_renew)
+
+    async def _async_renew(self, now):
+        self._unsubRenew = None
+        if not await self._async_subscribe():
+            self._scheduleRenew(EVENT_RESUBSCRIBE_INTERVAL)
+
+
+def _parseTimeout(timeout):
+    """Convert a UPnP 'Second-nnn' timeout header into seconds."""
+    try:
+        return int(timeout.split("-", 1)[1])
+    except (AttributeError, IndexError, ValueError):
+        return EVENT_SUBSCRIPTION_TIMEOUT
+
+
+def _getLocalIp(host):
+    """Find the local address the box can reach us on."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect((host, 1))
+        return sock.getsockname()[0]
+    finally:
+        sock.close()
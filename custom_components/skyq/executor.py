@@ -0,0 +1,99 @@
+"""Thread pool for the blocking work of the integration."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from .const import (
+    CALL_STATS_WINDOW,
+    DOMAIN,
+    EXECUTOR,
+    EXECUTOR_MAX_THREADS,
+    EXECUTOR_MIN_THREADS,
+    EXECUTOR_THREADS_PER_BOX,
+)
+from .util.stats import CallStats
+
+
+def getExecutor(hass):
+    """Get the thread pool shared by all boxes."""
+    hass.data.setdefault(DOMAIN, {})
+    executor = hass.data[DOMAIN].get(EXECUTOR)
+    if not executor:
+        executor = SkyQExecutor(hass)
+        hass.data[DOMAIN][EXECUTOR] = executor
+    return executor
+
+
+class SkyQExecutor:
+    """Run blocking work on threads of its own, rather than Home Assistant's.
+
+    A few jobs may run at once for each box, with the rest queued, so boxes
+    that hang only hold up Sky Q work. A slot is only freed when its thread
+    has actually finished, even if the caller has given up waiting.
+    """
+
+    def __init__(self, hass):
+        """Initialise the thread pool."""
+        self._hass = hass
+        self._hosts = set()
+        self._limit = EXECUTOR_MIN_THREADS
+        self._slots = asyncio.Semaphore(self._limit)
+        self._pool = ThreadPoolExecutor(
+            max_workers=EXECUTOR_MAX_THREADS, thread_name_prefix="skyq"
+        )
+        self._running = 0
+        self._queued = 0
+        self._peakQueued = 0
+        self._waits = CallStats(CALL_STATS_WINDOW)
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._handleStop)
+
+    def addBox(self, host):
+        """Allow more jobs to run at once, for another box."""
+        if host in self._hosts:
+            return
+        self._hosts.add(host)
+        limit = min(
+            EXECUTOR_MAX_THREADS,
+            max(EXECUTOR_MIN_THREADS, len(self._hosts) * EXECUTOR_THREADS_PER_BOX),
+        )
+        for _ in range(limit - self._limit):
+            self._slots.release()
+        self._limit = limit
+
+    async def async_run(self, target, *args):
+        """Run the blocking function once a thread is free, returning its result."""
+        queued = time.perf_counter()
+        self._queued += 1
+        if self._slots.locked():
+            self._peakQueued = max(self._peakQueued, self._queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        self._waits.record("wait", time.perf_counter() - queued)
+
+        self._running += 1
+        future = self._pool.submit(target, *args)
+        future.add_done_callback(
+            lambda _: self._hass.loop.call_soon_threadsafe(self._release)
+        )
+        return await asyncio.wrap_future(future)
+
+    def summary(self):
+        """Summarise how busy the threads are, and how long jobs wait for one."""
+        return {
+            "threads": self._limit,
+            "running": self._running,
+            "queued": self._queued,
+            "peak_queued": self._peakQueued,
+            "wait": self._waits.summary().get("wait"),
+        }
+
+    def _release(self):
+        self._running -= 1
+        self._slots.release()
+
+    def _handleStop(self, event):
+        self._pool.shutdown(wait=False)
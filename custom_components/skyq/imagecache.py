@@ -0,0 +1,196 @@
+"""Local cache of the programme and recording images of the Sky Q boxes."""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+from collections import OrderedDict
+
+import aiohttp
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    DOMAIN,
+    IMAGE_CACHE,
+    IMAGE_CACHE_DIRECTORY,
+    IMAGE_CACHE_MAX_SIZE,
+    IMAGE_THUMBNAIL_SIZE,
+    TIMEOUT,
+)
+from .executor import getExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+_LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png"}
+
+
+async def async_getImageCache(hass):
+    """Get the image cache shared by all boxes, starting it on first use."""
+    hass.data.setdefault(DOMAIN, {})
+    imageCache = hass.data[DOMAIN].get(IMAGE_CACHE)
+    if not imageCache:
+        imageCache = SkyQImageCache(hass)
+        hass.data[DOMAIN][IMAGE_CACHE] = imageCache
+        await imageCache.async_start()
+    return imageCache
+
+
+def imageCacheKey(url):
+    """Stable key for an image, used for its file name and as its hash."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+
+class SkyQImageCache:
+    """Downscaled images kept on disk, evicting the least recently used."""
+
+    def __init__(self, hass):
+        """Initialise the cache."""
+        self._hass = hass
+        self._executor = getExecutor(hass)
+        self._websession = async_get_clientsession(hass)
+        self._directory = hass.config.path(*IMAGE_CACHE_DIRECTORY)
+        self._files = OrderedDict()
+        self._size = 0
+        self._fetching = {}
+
+    async def async_start(self):
+        """Index the images already cached, oldest first."""
+        files = await self._executor.async_run(_indexDirectory, self._directory)
+        for fileName, size in files:
+            self._files[os.path.splitext(fileName)[0]] = (fileName, size)
+            self._size += size
+
+    async def async_getImage(self, url):
+        """Get the image content and type, fetching it if it is not cached."""
+        key = imageCacheKey(url)
+        if key in self._files:
+            self._files.move_to_end(key)
+            fileName = self._files[key][0]
+            content = await self._executor.async_run(
+                _readFile, os.path.join(self._directory, fileName)
+            )
+            if content is not None:
+                return content, CONTENT_TYPES[os.path.splitext(fileName)[1]]
+            self._forget(key)
+
+        return await asyncio.shield(self._startFetch(key, url))
+
+    def prefetch(self, url):
+        """Fetch an image into the cache ahead of it being requested."""
+        key = imageCacheKey(url)
+        if key not in self._files:
+            self._startFetch(key, url)
+
+    def _startFetch(self, key, url):
+        # Several players may be showing the same programme, so only fetch it once
+        if key not in self._fetching:
+            task = self._hass.async_create_task(self._async_fetch(key, url))
+            task.add_done_callback(lambda _: self._fetching.pop(key, None))
+            self._fetching[key] = task
+        return self._fetching[key]
+
+    async def _async_fetch(self, key, url):
+        try:
+            async with self._websession.get(url, timeout=TIMEOUT * 5) as response:
+                if response.status != 200:
+                    return None, None
+                content = await response.read()
+                contentType = response.content_type
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.debug(f"Image retrieval failed: {url} : {err}")
+            return None, None
+
+        fileName, content, contentType = await self._executor.async_run(
+            _storeImage, self._directory, key, content, contentType
+        )
+        if fileName:
+            self._forget(key)
+            self._files[key] = (fileName, len(content))
+            self._size += len(content)
+            await self._async_evict()
+        return content, contentType
+
+    async def _async_evict(self):
+        evicted = []
+        while self._size > IMAGE_CACHE_MAX_SIZE and len(self._files) > 1:
+            key = next(iter(self._files))
+            evicted.append(self._files[key][0])
+            self._forget(key)
+        if evicted:
+            await self._executor.async_run(_removeFiles, self._directory, evicted)
+
+    def _forget(self, key):
+        if key in self._files:
+            self._size -= self._files.pop(key)[1]
+
+
+def _indexDirectory(directory):
+    """List the cached images, least recently used first."""
+    files = []
+    try:
+        os.makedirs(directory, exist_ok=True)
+        for entry in os.scandir(directory):
+            if entry.is_file() and os.path.splitext(entry.name)[1] in CONTENT_TYPES:
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+    except OSError as err:
+        _LOGGER.warning(f"W0020I - Image cache not accessible: {directory} : {err}")
+    return [(name, size) for _, name, size in sorted(files)]
+
+
+def _readFile(path):
+    """Read a cached image, marking it as recently used."""
+    try:
+        with open(path, "rb") as imageFile:
+            content = imageFile.read()
+        os.utime(path)
+        return content
+    except OSError:
+        return None
+
+
+def _storeImage(directory, key, content, contentType):
+    """Downscale the image where possible, and write it to the cache."""
+    extension = next(
+        (ext for ext, cType in CONTENT_TYPES.items() if cType == contentType), None
+    )
+    if Image:
+        try:
+            image = Image.open(io.BytesIO(content))
+            image.thumbnail(IMAGE_THUMBNAIL_SIZE)
+            thumbnail = io.BytesIO()
+            image.convert("RGB").save(thumbnail, "JPEG", quality=85, optimize=True)
+            content = thumbnail.getvalue()
+            contentType = CONTENT_TYPES[".jpg"]
+            extension = ".jpg"
+        except (OSError, ValueError) as err:
+            _LOGGER.debug(f"Image could not be downscaled: {key} : {err}")
+
+    if not extension:
+        return None, content, contentType
+
+    fileName = key + extension
+    temporaryPath = os.path.join(directory, f".{fileName}.tmp")
+    try:
+        with open(temporaryPath, "wb") as imageFile:
+            imageFile.write(content)
+        os.replace(temporaryPath, os.path.join(directory, fileName))
+    except OSError as err:
+        _LOGGER.warning(f"W0010I - Image could not be cached: {fileName} : {err}")
+        return None, content, contentType
+    return fileName, content, contentType
+
+
+def _removeFiles(directory, fileNames):
+    """Remove evicted images."""
+    for fileName in fileNames:
+        try:
+            os.remove(os.path.join(directory, fileName))
+        except OSError:
+            pass
@@ -1,9 +1,7 @@
 """The skyq platform allows you to control a SkyQ set top box."""
-import asyncio
 import logging
-from dataclasses import InitVar, dataclass, field
+from dataclasses import replace
 
-import aiohttp
 from pyskyqremote.const import (
     APP_EPG,
     SKY_STATE_OFF,
@@ -11,7 +9,6 @@ from pyskyqremote.const import (
     SKY_STATE_PAUSED,
     SKY_STATE_STANDBY,
 )
-from pyskyqremote.skyq_remote import SkyQRemote
 
 from custom_components.skyq.util.config_gen import SwitchMaker
 from homeassistant.components.media_player.const import (
@@ -38,7 +35,7 @@ from homeassistant.const import (
     ATTR_SUPPORTED_FEATURES,
     CONF_HOST,
     CONF_NAME,
-    HTTP_OK,
+    CONF_SCAN_INTERVAL,
     SERVICE_VOLUME_DOWN,
     SERVICE_VOLUME_MUTE,
     SERVICE_VOLUME_SET,
@@ -48,48 +45,41 @@ from homeassistant.const import (
     STATE_PLAYING,
     STATE_UNKNOWN,
 )
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry, entity_registry
 from homeassistant.helpers.service import async_call_from_config
 
+from .appimages import async_getAppImages
+from .classes.config import build_config
+from .classes.playerstate import PlayerState
+from .client import AsyncSkyQRemote
 from .const import (
-    APP_IMAGE_URL_BASE,
     APP_TITLES,
-    CONF_CHANNEL_SOURCES,
-    CONF_COUNTRY,
     CONF_DIR,
-    CONF_GEN_SWITCH,
-    CONF_LIVE_TV,
-    CONF_OUTPUT_PROGRAMME_IMAGE,
-    CONF_ROOM,
-    CONF_SOURCES,
-    CONF_TEST_CHANNEL,
-    CONF_VOLUME_ENTITY,
-    CONST_DEFAULT_ROOM,
+    CONST_DIAGNOSTICS,
     CONST_SKYQ_MEDIA_TYPE,
+    CONST_STATE_RETRIEVED,
+    CONST_UPDATE_INTERVAL,
+    COORDINATOR,
     DEVICE_CLASS,
     DOMAIN,
-    FEATURE_BASIC,
     FEATURE_IMAGE,
-    FEATURE_LIVE_TV,
+    FEATURE_IMAGE_CACHE,
     FEATURE_SWITCHES,
     SKYQ_APP,
     SKYQ_ICONS,
     SKYQ_LIVE,
     SKYQ_PVR,
-    SKYQREMOTE,
-    TIMEOUT,
 )
-from .utils import convert_sources
+from .coordinator import SkyQCoordinator
+from .executor import getExecutor
+from .imagecache import async_getImageCache
+from .schema import SCAN_INTERVAL
+from .startup import async_getStartup
 
 # from homeassistant.exceptions import PlatformNotReady
 
 
-try:
-    from homeassistant.helpers.network import get_url
-except ImportError:
-    pass
-
-
 try:
     from homeassistant.components.media_player import MediaPlayerEntity
 except ImportError:
@@ -100,13 +90,11 @@ except ImportError:
 
 _LOGGER = logging.getLogger(__name__)
 
-ENABLED_FEATURES = FEATURE_BASIC | FEATURE_IMAGE | FEATURE_LIVE_TV | FEATURE_SWITCHES
-
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the SkyQ platform."""
     host = config.get(CONF_HOST)
-    remote = await hass.async_add_executor_job(SkyQRemote, host)
+    remote = AsyncSkyQRemote(hass, host)
 
     config_directory = config.get(CONF_DIR)
     if config_directory:
@@ -117,90 +105,80 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     unique_id = None
     name = config.get(CONF_NAME)
 
-    await _async_setup_platform_entry(
-        config, async_add_entities, remote, unique_id, name, hass.config.config_dir,
+    coordinator = SkyQCoordinator(
+        hass,
+        remote,
+        build_config(unique_id, name, config),
+        config.get(CONF_SCAN_INTERVAL, SCAN_INTERVAL),
     )
+    startup = await async_getStartup(hass)
+
+    async def async_startThenAdd():
+        # Without a config entry, the unique id comes from the box. It can't be
+        # set once the entity is added, so add it once the box has been tried.
+        await startup.async_start(host, coordinator.async_start)
+        await _async_setup_platform_entry(hass, coordinator, async_add_entities)
+
+    hass.async_create_task(async_startThenAdd())
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up a SKY Q entity."""
-    remote = hass.data[DOMAIN][config_entry.entry_id][SKYQREMOTE]
+    coordinator = hass.data[DOMAIN][config_entry.entry_id][COORDINATOR]
 
-    unique_id = config_entry.unique_id
-    name = config_entry.data[CONF_NAME]
+    await _async_setup_platform_entry(hass, coordinator, async_add_entities)
 
-    await _async_setup_platform_entry(
-        config_entry.options,
-        async_add_entities,
-        remote,
-        unique_id,
-        name,
-        hass.config.config_dir,
-    )
 
+async def _async_setup_platform_entry(hass, coordinator, async_add_entities):
 
-async def _async_setup_platform_entry(
-    config_item, async_add_entities, remote, unique_id, name, config_dir
-):
-
-    config = Config(
-        unique_id,
-        name,
-        config_item.get(CONF_ROOM, CONST_DEFAULT_ROOM),
-        config_item.get(CONF_VOLUME_ENTITY, None),
-        config_item.get(CONF_TEST_CHANNEL),
-        config_item.get(CONF_COUNTRY),
-        config_item.get(CONF_SOURCES),
-        config_item.get(CONF_CHANNEL_SOURCES, []),
-        config_item.get(CONF_GEN_SWITCH, False),
-        config_item.get(CONF_OUTPUT_PROGRAMME_IMAGE, True),
-        config_item.get(CONF_LIVE_TV, True),
-    )
-
+    config = coordinator.config
     if config.enabled_features & FEATURE_SWITCHES:
-        SwitchMaker(
-            config_dir, name, config.room, config.source_list,
+        await getExecutor(hass).async_run(
+            SwitchMaker,
+            hass.config.config_dir,
+            config.name,
+            config.room,
+            config.source_list,
         )
 
-    player = SkyQDevice(remote, config,)
-    async_add_entities([player], True)
+    appImages = await async_getAppImages(hass)
+    imageCache = None
+    if config.enabled_features & FEATURE_IMAGE_CACHE:
+        imageCache = await async_getImageCache(hass)
+    player = SkyQDevice(coordinator, appImages, imageCache)
+    async_add_entities([player])
+
+
+async def _async_getRegistry(hass, registry):
+    if hasattr(registry, "async_get"):
+        return registry.async_get(hass)
+    return await registry.async_get_registry(hass)
 
 
 class SkyQDevice(MediaPlayerEntity):
     """Representation of a SkyQ Box."""
 
     def __init__(
-        self, remote, config,
+        self, coordinator, appImages, imageCache,
     ):
         """Initialise the SkyQRemote."""
-        self._config = config
-        self._unique_id = config.unique_id
-        self._volume_entity = config.volume_entity
-        self._volume_entity_supported_features = None
-        self._state = STATE_OFF
-        self._skyq_type = STATE_OFF
-        self._title = None
-        self._channel = None
-        self._episode = None
-        self._imageUrl = None
-        self._imageRemotelyAccessible = False
-        self._season = None
-        self._lastAppTitle = None
-        self._appImageUrl = None
-        self._remote = remote
-        self._available = True
+        self._coordinator = coordinator
+        self._appImages = appImages
+        self._imageCache = imageCache
+        self._config = coordinator.config
+        self._unique_id = self._config.unique_id
+        self._volume_entity = self._config.volume_entity
+        self._remote = coordinator.remote
+        # Pending until the coordinator has first heard from the box
+        self._playerState = PlayerState(available=False)
+        self._optimisticState = {}
+        self._pending = True
         self._startupSetup = True
-        self._deviceInfo = None
-        self._firstError = True
+        self._deviceLinked = False
         self._volume_entity_error = False
-        self._channel_list = None
-        self._volume_level = 0
-        self._is_volume_muted = True
 
-        if not self._remote.deviceSetup:
-            self._available = False
-            self._startupSetup = False
-            _LOGGER.warning(f"W0010M - Device is not available: {self.name}")
+        if self._coordinator.deviceInfo:
+            self._setUniqueId()
 
         self._supported_features = (
             SUPPORT_TURN_OFF
@@ -218,14 +196,15 @@ class SkyQDevice(MediaPlayerEntity):
     @property
     def supported_features(self):
         """Get the supported features."""
-        if self._volume_entity_supported_features:
-            if self._volume_entity_supported_features & SUPPORT_VOLUME_MUTE:
+        volumeFeatures = self._playerState.volumeFeatures
+        if volumeFeatures:
+            if volumeFeatures & SUPPORT_VOLUME_MUTE:
                 self._supported_features = (
                     self._supported_features | SUPPORT_VOLUME_MUTE
                 )
-            if self._volume_entity_supported_features & SUPPORT_VOLUME_SET:
+            if volumeFeatures & SUPPORT_VOLUME_SET:
                 self._supported_features = self._supported_features | SUPPORT_VOLUME_SET
-            if self._volume_entity_supported_features & SUPPORT_VOLUME_STEP:
+            if volumeFeatures & SUPPORT_VOLUME_STEP:
                 self._supported_features = (
                     self._supported_features | SUPPORT_VOLUME_STEP
                 )
@@ -238,13 +217,13 @@ class SkyQDevice(MediaPlayerEntity):
 
     @property
     def should_poll(self):
-        """Device should be polled."""
-        return True
+        """Device is updated by the coordinator."""
+        return False
 
     @property
     def state(self):
         """Get the device state. An exception means OFF state."""
-        return self._state
+        return self._playerState.state
 
     @property
     def source_list(self):
@@ -254,24 +233,32 @@ class SkyQDevice(MediaPlayerEntity):
     @property
     def media_image_url(self):
         """Image url of current playing media."""
-        return self._imageUrl if self._config.enabled_features & FEATURE_IMAGE else None
+        if self._config.enabled_features & FEATURE_IMAGE:
+            return self._playerState.imageUrl
+        return None
 
     @property
     def media_image_remotely_accessible(self):
         """Is the media image available outside home network."""
-        return self._imageRemotelyAccessible
+        return self._playerState.imageRemotelyAccessible
+
+    async def async_get_media_image(self):
+        """Fetch the media image, from the local cache where it is cached."""
+        if self._playerState.imageCached and self.media_image_url:
+            return await self._imageCache.async_getImage(self.media_image_url)
+        return await super().async_get_media_image()
 
     @property
     def media_channel(self):
         """Channel currently playing."""
-        return self._channel
+        return self._playerState.channel
 
     @property
     def media_content_type(self):
         """Content type of current playing media."""
         if self.state == STATE_UNKNOWN:
             return None
-        if self._skyq_type == SKYQ_APP:
+        if self._playerState.skyqType == SKYQ_APP:
             return MEDIA_TYPE_APP
 
         return MEDIA_TYPE_TVSHOW
@@ -279,27 +266,33 @@ class SkyQDevice(MediaPlayerEntity):
     @property
     def media_series_title(self):
         """Get the title of the series of current playing media."""
-        return self._title if self._channel is not None else None
+        playerState = self._playerState
+        return playerState.title if playerState.channel is not None else None
 
     @property
     def media_title(self):
         """Title of current playing media."""
-        return self._channel if self._channel is not None else self._title
+        playerState = self._playerState
+        return (
+            playerState.channel
+            if playerState.channel is not None
+            else playerState.title
+        )
 
     @property
     def media_season(self):
         """Season of current playing media (TV Show only)."""
-        return self._season
+        return self._playerState.season
 
     @property
     def media_episode(self):
         """Episode of current playing media (TV Show only)."""
-        return self._episode
+        return self._playerState.episode
 
     @property
     def icon(self):
         """Entity icon."""
-        return SKYQ_ICONS[self._skyq_type]
+        return SKYQ_ICONS[self._playerState.skyqType]
 
     @property
     def device_class(self):
@@ -309,19 +302,20 @@ class SkyQDevice(MediaPlayerEntity):
     @property
     def available(self):
         """Entity availability."""
-        return self._available
+        return self._playerState.available
 
     @property
     def device_info(self):
         """Entity device information."""
         device_info = None
-        if self._deviceInfo:
+        deviceInfo = self._coordinator.deviceInfo
+        if deviceInfo:
             device_info = {
-                "identifiers": {(DOMAIN, self._deviceInfo.serialNumber)},
+                "identifiers": {(DOMAIN, deviceInfo.serialNumber)},
                 "name": self.name,
-                "manufacturer": self._deviceInfo.manufacturer,
-                "model": self._deviceInfo.hardwareModel,
-                "sw_version": f"{self._deviceInfo.ASVersion}:{self._deviceInfo.versionNumber}",
+                "manufacturer": deviceInfo.manufacturer,
+                "model": deviceInfo.hardwareModel,
+                "sw_version": f"{deviceInfo.ASVersion}:{deviceInfo.versionNumber}",
             }
         return device_info
 
@@ -334,97 +328,110 @@ class SkyQDevice(MediaPlayerEntity):
     def device_state_attributes(self):
         """Return entity specific state attributes."""
         attributes = {}
-        attributes[CONST_SKYQ_MEDIA_TYPE] = self._skyq_type
+        attributes[CONST_SKYQ_MEDIA_TYPE] = self._playerState.skyqType
+        attributes[CONST_UPDATE_INTERVAL] = self._playerState.updateInterval
+        attributes[CONST_STATE_RETRIEVED] = self._playerState.stateRetrieved
+        # Read as the state is written, so it doesn't cause writes of its own
+        attributes[CONST_DIAGNOSTICS] = self._coordinator.diagnosticsSummary()
         return attributes
 
     @property
     def volume_level(self):
         """Volume level of entity specified in config."""
-        return self._volume_level
+        return self._playerState.volumeLevel
 
     @property
     def is_volume_muted(self):
         """Boolean if volume is muted."""
-        return self._is_volume_muted
+        return self._playerState.volumeMuted
+
+    async def async_added_to_hass(self):
+        """Listen to the coordinator when added to hass."""
+        self.async_on_remove(
+            self._coordinator.async_add_listener(self._handleCoordinatorUpdate)
+        )
+        self._updateFromCoordinator()
+        self._linkDevice()
 
     async def async_update(self):
         """Get the latest data and update device state."""
-        self._channel = None
-        self._episode = None
-        self._imageUrl = None
-        self._season = None
-        self._title = None
-
-        if not self._deviceInfo:
-            await self._async_getDeviceInfo()
-
-        if self._deviceInfo:
-            await self._async_updateState()
-
-        if self._state != STATE_UNKNOWN and self._state != STATE_OFF:
-            await self._async_updateCurrentProgramme()
-            await self._async_update_volume_state()
+        # Only called explicitly, after commands, so keep a close eye on the box
+        self._coordinator.pollFast()
+        await self._coordinator.async_request_refresh()
 
     async def async_turn_off(self):
         """Turn SkyQ box off."""
-        powerStatus = await self.hass.async_add_executor_job(self._remote.powerStatus)
+        powerStatus = await self._remote.powerStatus()
         if powerStatus == SKY_STATE_ON:
-            await self.hass.async_add_executor_job(self._remote.press, "power")
-            await self.async_update()
+            await self._remote.press("power")
+            self._setOptimisticState(
+                state=STATE_OFF,
+                skyqType=STATE_OFF,
+                channel=None,
+                episode=None,
+                imageUrl=None,
+                season=None,
+                title=None,
+            )
 
     async def async_turn_on(self):
         """Turn SkyQ box on."""
-        powerStatus = await self.hass.async_add_executor_job(self._remote.powerStatus)
+        powerStatus = await self._remote.powerStatus()
         if powerStatus == SKY_STATE_STANDBY:
-            await self.hass.async_add_executor_job(
-                self._remote.press, ["home", "dismiss"]
-            )
-            await self.async_update()
+            await self._remote.press(["home", "dismiss"])
+            self._setOptimisticState(state=STATE_PLAYING)
 
     async def async_media_play(self):
         """Play the current media item."""
-        await self.hass.async_add_executor_job(self._remote.press, "play")
-        self._state = STATE_PLAYING
-        self.async_write_ha_state()
+        await self._remote.press("play")
+        if self._setPlayerState(state=STATE_PLAYING):
+            self.async_write_ha_state()
 
     async def async_media_pause(self):
         """Pause the current media item."""
-        await self.hass.async_add_executor_job(self._remote.press, "pause")
-        self._state = STATE_PAUSED
-        self.async_write_ha_state()
+        await self._remote.press("pause")
+        if self._setPlayerState(state=STATE_PAUSED):
+            self.async_write_ha_state()
 
     async def async_media_next_track(self):
         """Fast forward the current media item."""
-        await self.hass.async_add_executor_job(self._remote.press, "fastforward")
-        await self.async_update()
+        await self._remote.press("fastforward")
+        self._setOptimisticState(state=STATE_PLAYING)
 
     async def async_media_previous_track(self):
         """Rewind the current media item."""
-        await self.hass.async_add_executor_job(self._remote.press, "rewind")
-        await self.async_update()
+        await self._remote.press("rewind")
+        self._setOptimisticState(state=STATE_PLAYING)
 
     async def async_select_source(self, source):
         """Select the specified source."""
         command = None
+        optimistic = {}
         if source in self._config.custom_sources:
             command = self._config.custom_sources.get(source).split(",")
         else:
-            try:
-                channel = next(c for c in self._channel_list if c.channelname == source)
-                command = list(channel.channelno)
-            except (TypeError, StopIteration):
-                command = source
+            channelIndex = self._coordinator.channelIndex
+            channel = channelIndex.getByName(source) if channelIndex else None
+            command = list(channel.channelno) if channel else source
+            if channel:
+                optimistic = {
+                    "state": STATE_PLAYING,
+                    "skyqType": SKYQ_LIVE,
+                    "channel": channel.channelname,
+                    "episode": None,
+                    "imageUrl": None,
+                    "season": None,
+                    "title": None,
+                }
         if command:
-            await self.hass.async_add_executor_job(self._remote.press, command)
-            await self.async_update()
+            await self._remote.press(command)
+            self._setOptimisticState(**optimistic)
 
     async def async_play_media(self, media_id, media_type):
         """Perform a media action."""
         if media_type.casefold() == DOMAIN:
-            await self.hass.async_add_executor_job(
-                self._remote.press, media_id.casefold()
-            )
-            await self.async_update()
+            await self._remote.press(media_id.casefold())
+            self._setOptimisticState()
 
     async def async_mute_volume(self, mute):
         """Mute the volume."""
@@ -457,236 +464,199 @@ class SkyQDevice(MediaPlayerEntity):
         )
         return
 
-    async def _async_updateState(self):
-        powerState = await self.hass.async_add_executor_job(self._remote.powerStatus)
-        self._setPowerStatus(powerState)
-        if powerState == SKY_STATE_ON:
-            self._state = STATE_PLAYING
-            # This check is flakey during channel changes, so only used for pause checks if we know its on
-            currentState = await self.hass.async_add_executor_job(
-                self._remote.getCurrentState
+    @callback
+    def _handleCoordinatorUpdate(self):
+        if self._updateFromCoordinator():
+            self.async_write_ha_state()
+        if self._coordinator.deviceInfo:
+            self._linkDevice()
+
+    def _linkDevice(self):
+        """Link the entity to its device, as it may be added before the box is heard from."""
+        if self._deviceLinked or not self.platform.config_entry:
+            return
+        if not self.registry_entry:
+            return
+        self._deviceLinked = bool(self._coordinator.deviceInfo)
+        self.hass.async_create_task(self._async_linkDevice())
+
+    async def _async_linkDevice(self):
+        entryId = self.platform.config_entry.entry_id
+        deviceRegistry = await _async_getRegistry(self.hass, device_registry)
+        if self._coordinator.deviceInfo:
+            device = deviceRegistry.async_get_or_create(
+                config_entry_id=entryId, **self.device_info
+            )
+        else:
+            # Not heard from the box yet, so keep the device it had before
+            devices = device_registry.async_entries_for_config_entry(
+                deviceRegistry, entryId
             )
-            if currentState == SKY_STATE_PAUSED:
-                self._state = STATE_PAUSED
+            if not devices:
+                return
+            device = devices[0]
+        if self.registry_entry.device_id != device.id:
+            entityRegistry = await _async_getRegistry(self.hass, entity_registry)
+            self.registry_entry = entityRegistry.async_update_entity(
+                self.entity_id, device_id=device.id
+            )
+
+    def _updateFromCoordinator(self):
+        """Update the entity from the latest box state, returning if it changed."""
+        boxState = self._coordinator.data
+        if not boxState:
+            return False
+
+        changes = {
+            "available": self._getAvailability(boxState.powerStatus),
+            "channel": None,
+            "episode": None,
+            "imageUrl": None,
+            "season": None,
+            "title": None,
+            "updateInterval": int(self._coordinator.pollInterval),
+            "stateRetrieved": self._coordinator.stateRetrieved(),
+        }
+        if boxState.powerStatus == SKY_STATE_ON:
+            # This check is flakey during channel changes, so only used for pause checks if we know its on
+            if boxState.currentState == SKY_STATE_PAUSED:
+                changes["state"] = STATE_PAUSED
             else:
-                self._state = STATE_PLAYING
-        elif powerState == SKY_STATE_STANDBY:
-            self._skyq_type = STATE_OFF
-            self._state = STATE_OFF
+                changes["state"] = STATE_PLAYING
+            changes.update(self._getCurrentProgramme(boxState))
+            changes.update(self._getVolumeState())
+        elif boxState.powerStatus == SKY_STATE_STANDBY:
+            changes["skyqType"] = STATE_OFF
+            changes["state"] = STATE_OFF
+        else:
+            changes["skyqType"] = STATE_UNKNOWN
+            changes["state"] = STATE_OFF
+
+        if self._coordinator.settling:
+            # Hold what the command is expected to do until the box has settled
+            changes.update(self._optimisticState)
         else:
-            self._skyq_type = STATE_UNKNOWN
-            self._state = STATE_OFF
+            self._optimisticState = {}
+
+        return self._setPlayerState(**changes)
 
-    async def _async_update_volume_state(self):
+    def _setOptimisticState(self, **changes):
+        """Show the expected result of a command, until the box confirms it."""
+        self._optimisticState.update(changes)
+        if self._setPlayerState(**changes):
+            self.async_write_ha_state()
+        self._coordinator.refreshWhenSettled()
+
+    def _setPlayerState(self, **changes):
+        """Apply changes to the player state, returning if it actually changed."""
+        playerState = replace(self._playerState, **changes)
+        changed = playerState != self._playerState
+        self._playerState = playerState
+        return changed
+
+    def _getVolumeState(self):
         if not self._volume_entity:
-            return
+            return {}
 
-        try:
-            state_obj = self.hass.states.get(self._volume_entity)
-            if state_obj:
-                self._volume_level = state_obj.attributes.get(ATTR_MEDIA_VOLUME_LEVEL)
-                self._is_volume_muted = state_obj.attributes.get(
-                    ATTR_MEDIA_VOLUME_MUTED
+        state_obj = self.hass.states.get(self._volume_entity)
+        if state_obj:
+            if self._volume_entity_error:
+                _LOGGER.info(
+                    f"I0040M - Volume entity now exists: {self.name} - {self._volume_entity}"
                 )
-                self._volume_entity_supported_features = state_obj.attributes.get(
-                    ATTR_SUPPORTED_FEATURES
-                )
-                if self._volume_entity_error:
-                    _LOGGER.info(
-                        f"I0040M - Volume entity now exists: {self.name} - {self._volume_entity}"
-                    )
-                    self._volume_entity_error = False
-            else:
-                if not self._volume_entity_error:
-                    _LOGGER.warning(
-                        f"W0030M - Volume entity does not exist: {self.name} - {self._volume_entity}"
-                    )
-                    self._volume_entity_error = True
-            return
-        except (TypeError, ValueError):
-            return None
+                self._volume_entity_error = False
+            return {
+                "volumeLevel": state_obj.attributes.get(ATTR_MEDIA_VOLUME_LEVEL),
+                "volumeMuted": state_obj.attributes.get(ATTR_MEDIA_VOLUME_MUTED),
+                "volumeFeatures": state_obj.attributes.get(ATTR_SUPPORTED_FEATURES),
+            }
 
-    async def _async_updateCurrentProgramme(self):
+        if not self._volume_entity_error:
+            _LOGGER.warning(
+                f"W0030M - Volume entity does not exist: {self.name} - {self._volume_entity}"
+            )
+            self._volume_entity_error = True
+        return {}
 
-        app = await self.hass.async_add_executor_job(self._remote.getActiveApplication)
+    def _getCurrentProgramme(self, boxState):
+        app = boxState.app
         appTitle = app
         if appTitle.casefold() in APP_TITLES:
             appTitle = APP_TITLES[appTitle.casefold()]
 
         if app == APP_EPG:
-            await self._async_getCurrentMedia()
+            programme = self._getCurrentMedia(boxState)
         else:
-            self._skyq_type = SKYQ_APP
-            self._title = appTitle
+            programme = {"skyqType": SKYQ_APP, "title": appTitle}
 
-        self._imageRemotelyAccessible = True
-        if not self._imageUrl:
-            appImageUrl = await self._async_getAppImageUrl(appTitle)
+        imageUrl = programme.get("imageUrl")
+        programme["imageRemotelyAccessible"] = True
+        programme["imageCached"] = False
+        if not imageUrl:
+            appImageUrl = self._appImages.getImageUrl(appTitle)
             if appImageUrl:
-                self._imageUrl = appImageUrl
-                self._imageRemotelyAccessible = False
-
-    async def _async_getCurrentMedia(self):
-        try:
-            currentMedia = await self.hass.async_add_executor_job(
-                self._remote.getCurrentMedia
-            )
-
-            if currentMedia.live and currentMedia.sid:
-                self._channel = currentMedia.channel
-                self._imageUrl = currentMedia.imageUrl
-                self._skyq_type = SKYQ_LIVE
-                if self._config.enabled_features & FEATURE_LIVE_TV:
-                    currentProgramme = await self.hass.async_add_executor_job(
-                        self._remote.getCurrentLiveTVProgramme, currentMedia.sid
-                    )
-                    if currentProgramme:
-                        self._episode = currentProgramme.episode
-                        self._season = currentProgramme.season
-                        self._title = currentProgramme.title
-                        if currentProgramme.imageUrl:
-                            self._imageUrl = currentProgramme.imageUrl
-            elif currentMedia.pvrId:
-                recording = await self.hass.async_add_executor_job(
-                    self._remote.getRecording, currentMedia.pvrId
-                )
-                self._skyq_type = SKYQ_PVR
-                if recording:
-                    self._channel = recording.channel
-                    self._episode = recording.episode
-                    self._season = recording.season
-                    self._title = recording.title
-                    self._imageUrl = recording.imageUrl
-
-        except Exception as err:
-            _LOGGER.exception(
-                f"X0010M - Current Media retrieval failed: {currentMedia} : {err}"
-            )
-
-    async def _async_getAppImageUrl(self, appTitle):
-        """Check app image is present."""
-        if appTitle == self._lastAppTitle:
-            return self._appImageUrl
-
-        self._appImageUrl = None
-
-        appImageUrl = APP_IMAGE_URL_BASE.format(appTitle.casefold())
-
-        websession = async_get_clientsession(self.hass)
-        try:
-            base_url = get_url(self.hass)
-        except NameError:
-            base_url = self.hass.config.api.base_url
-        request_url = base_url + appImageUrl
-
-        try:
-            async with getattr(websession, "head")(
-                request_url, timeout=TIMEOUT,
-            ) as response:
-                if response.status == HTTP_OK:
-                    self._appImageUrl = appImageUrl
-
-                self._lastAppTitle = appTitle
-
-                return self._appImageUrl
-        except aiohttp.client_exceptions.ClientConnectorError as err:
-            # This error when server is starting up and app running
-            if self._firstError:
-                self._firstError = False
-            else:
-                _LOGGER.exception(
-                    f"X0020M - Image file check failed: {request_url} : {err}"
-                )
-                self._lastAppTitle = appTitle
-            return self._appImageUrl
-        except asyncio.TimeoutError as err:
-            _LOGGER.info(f"I0030M - Image file check timed out: {request_url} : {err}")
-            self._lastAppTitle = appTitle
-            return self._appImageUrl
-        except (aiohttp.ClientError, Exception) as err:
-            _LOGGER.exception(
-                f"X0030M - Image file check failed: {request_url} : {err}"
-            )
-            self._lastAppTitle = appTitle
-            return self._appImageUrl
-
-    async def _async_getDeviceInfo(self):
-        await self.hass.async_add_executor_job(
-            self._remote.setOverrides,
-            self._config.overrideCountry,
-            self._config.test_channel,
-        )
-        self._deviceInfo = await self.hass.async_add_executor_job(
-            self._remote.getDeviceInformation
-        )
-        if self._deviceInfo:
-            self._setUniqueId()
-
-            if not self._channel_list and len(self._config.channel_sources) > 0:
-                channelData = await self.hass.async_add_executor_job(
-                    self._remote.getChannelList
-                )
-                self._channel_list = channelData.channels
+                programme["imageUrl"] = appImageUrl
+                programme["imageRemotelyAccessible"] = False
+        elif self._imageCache and self._config.enabled_features & FEATURE_IMAGE:
+            # Served by the entity image proxy, from the local cache
+            programme["imageRemotelyAccessible"] = False
+            programme["imageCached"] = True
+            self._imageCache.prefetch(imageUrl)
+        return programme
+
+    def _getCurrentMedia(self, boxState):
+        currentMedia = boxState.media
+        if not currentMedia:
+            return {}
+
+        media = {}
+        if currentMedia.live and currentMedia.sid:
+            media["channel"] = currentMedia.channel
+            media["imageUrl"] = currentMedia.imageUrl
+            media["skyqType"] = SKYQ_LIVE
+            currentProgramme = boxState.programme
+            if currentProgramme:
+                media["episode"] = currentProgramme.episode
+                media["season"] = currentProgramme.season
+                media["title"] = currentProgramme.title
+                if currentProgramme.imageUrl:
+                    media["imageUrl"] = currentProgramme.imageUrl
+        elif currentMedia.pvrId:
+            media["skyqType"] = SKYQ_PVR
+            recording = boxState.recording
+            if recording:
+                media["channel"] = recording.channel
+                media["episode"] = recording.episode
+                media["season"] = recording.season
+                media["title"] = recording.title
+                media["imageUrl"] = recording.imageUrl
+        return media
 
     def _setUniqueId(self):
         if not self._unique_id:
-            self._unique_id = self._deviceInfo.epgCountryCode + "".join(
-                e for e in self._deviceInfo.serialNumber.casefold() if e.isalnum()
+            deviceInfo = self._coordinator.deviceInfo
+            self._unique_id = deviceInfo.epgCountryCode + "".join(
+                e for e in deviceInfo.serialNumber.casefold() if e.isalnum()
             )
 
-    def _setPowerStatus(self, powerStatus):
-        if powerStatus == SKY_STATE_OFF and self._available:
-            self._available = False
+    def _getAvailability(self, powerStatus):
+        if self._pending:
+            self._pending = False
+            if powerStatus == SKY_STATE_OFF:
+                self._startupSetup = False
+                _LOGGER.warning(f"W0010M - Device is not available: {self.name}")
+            return powerStatus != SKY_STATE_OFF
+
+        available = self._playerState.available
+        if powerStatus == SKY_STATE_OFF and available:
             _LOGGER.info(f"I0010M - Device is not available: {self.name}")
+            return False
 
-        if powerStatus != SKY_STATE_OFF and not self._available:
-            self._available = True
+        if powerStatus != SKY_STATE_OFF and not available:
             if self._startupSetup:
                 _LOGGER.info(f"I0020M - Device is now available: {self.name}")
             else:
                 self._startupSetup = True
                 _LOGGER.warning(f"W0020M - Device is now available: {self.name}")
 
-
-@dataclass
-class Config:
-    """Sky Q configuration information."""
-
-    unique_id: str = field(init=True, repr=True, compare=True)
-    name: str = field(init=True, repr=True, compare=True)
-    room: str = field(init=True, repr=True, compare=True)
-    volume_entity: str = field(init=True, repr=True, compare=True)
-    test_channel: str = field(init=True, repr=True, compare=True)
-    overrideCountry: str = field(init=True, repr=True, compare=True)
-    custom_sources: field(init=True, repr=False, compare=True)
-    channel_sources: list = field(init=True, repr=True, compare=True)
-    generate_switches_for_channels: InitVar[bool]
-    output_programme_image: InitVar[bool]
-    live_tv: InitVar[bool]
-    enabled_features: int = None
-    source_list = None
-
-    def __post_init__(
-        self, generate_switches_for_channels, output_programme_image, live_tv
-    ):
-        """Set up the config."""
-        self.enabled_features = ENABLED_FEATURES
-        self.source_list = []
-
-        if not (output_programme_image):
-            self.enabled_features ^= FEATURE_IMAGE
-
-        if not (live_tv):
-            self.enabled_features ^= FEATURE_LIVE_TV
-
-        if not (generate_switches_for_channels):
-            self.enabled_features ^= FEATURE_SWITCHES
-
-        if isinstance(self.custom_sources, list):
-            self.custom_sources = convert_sources(sources_list=self.custom_sources)
-        elif not self.custom_sources:
-            self.custom_sources = []
-
-        if self.custom_sources and len(self.custom_sources) > 0:
-            self.source_list = [*self.custom_sources.keys()]
-        self.source_list += self.channel_sources
+        return powerStatus != SKY_STATE_OFF
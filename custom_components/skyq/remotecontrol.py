@@ -0,0 +1,138 @@
+"""Persistent remote control connection to a Sky Q box."""
+import asyncio
+import logging
+import math
+import time
+
+from .const import KEY_INTERVAL, REMOTE_IDLE_TIMEOUT, REMOTE_REUSE_CHECK, TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+HANDSHAKE_LENGTH = 24
+
+
+class SkyQRemoteControl:
+    """Send key presses to a box over one connection, reused between sequences.
+
+    Sequences are sent one after another, with the keys of each spaced
+    evenly. The connection is closed once it has been idle for a while, and
+    is re-established if the box drops it. Nothing is sent back once the
+    box is ready, so the connection is watched for the box closing it, and
+    the first key sent over a reused connection is checked for a reset.
+    """
+
+    def __init__(self, host, port):
+        """Initialise the connection."""
+        self._host = host
+        self._port = port
+        self._lock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+        self._watcher = None
+        self._idleHandle = None
+
+    async def async_press(self, codes):
+        """Press the keys in turn, returning whether they were all sent."""
+        async with self._lock:
+            self._cancelIdle()
+            try:
+                return await self._async_sendKeys(codes)
+            finally:
+                self._idleHandle = asyncio.get_running_loop().call_later(
+                    REMOTE_IDLE_TIMEOUT, self._close
+                )
+
+    async def async_close(self):
+        """Close the connection."""
+        async with self._lock:
+            self._cancelIdle()
+            self._close()
+
+    async def _async_sendKeys(self, codes):
+        nextKey = 0
+        for index, code in enumerate(codes):
+            if index:
+                await asyncio.sleep(max(0, nextKey - time.monotonic()))
+            nextKey = time.monotonic() + KEY_INTERVAL
+            # A connection left open may since have been dropped, so try a fresh one
+            for attempt in range(2):
+                try:
+                    reused = await self._async_connect()
+                    self._writer.write(_commandBytes(code))
+                    await asyncio.wait_for(self._writer.drain(), TIMEOUT)
+                    if reused and not index:
+                        await self._async_checkDelivered()
+                    break
+                except (OSError, asyncio.TimeoutError) as err:
+                    self._close()
+                    if attempt:
+                        _LOGGER.error(
+                            f"E0010R - Failed to send command: {self._host} : {code} : {err}"
+                        )
+                        return False
+        return True
+
+    async def _async_connect(self):
+        """Connect to the box, returning whether an open connection was reused."""
+        if self._writer and not self._writer.is_closing() and not self._watcher.done():
+            return True
+
+        self._close()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port), TIMEOUT
+        )
+        # The box greets, then the client echoes its messages until it is ready
+        strlen = 12
+        while True:
+            data = await asyncio.wait_for(self._reader.read(1024), TIMEOUT)
+            if not data:
+                raise ConnectionResetError("Connection closed during handshake")
+            if len(data) >= HANDSHAKE_LENGTH:
+                break
+            self._writer.write(data[0:strlen])
+            strlen = 1
+        self._watcher = asyncio.get_running_loop().create_task(
+            _async_watch(self._reader)
+        )
+        return False
+
+    async def _async_checkDelivered(self):
+        # A box that has silently dropped the connection answers with a reset
+        watcher = self._watcher
+        await asyncio.wait([watcher], timeout=REMOTE_REUSE_CHECK)
+        if watcher.done():
+            raise ConnectionResetError("Connection dropped by the box")
+
+    def _cancelIdle(self):
+        if self._idleHandle:
+            self._idleHandle.cancel()
+            self._idleHandle = None
+
+    def _close(self):
+        self._idleHandle = None
+        if self._watcher:
+            self._watcher.cancel()
+        if self._writer:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+        self._watcher = None
+
+
+async def _async_watch(reader):
+    """Read until the box closes the connection, discarding anything it sends."""
+    try:
+        while await reader.read(1024):
+            pass
+    except OSError:
+        pass
+
+
+def _commandBytes(code):
+    """Key down then key up, for the key code."""
+    command = bytearray(
+        [4, 1, 0, 0, 0, 0, int(math.floor(224 + (code / 16))), code % 16]
+    )
+    release = bytearray(command)
+    release[1] = 0
+    return bytes(command + release)
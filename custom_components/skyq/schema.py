@@ -9,6 +9,8 @@ from homeassistant.components.media_player import PLATFORM_SCHEMA
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_SCAN_INTERVAL
 
 from .const import (
+    CONF_CACHE_IMAGES,
+    CONF_CALL_TIMEOUT,
     CONF_COUNTRY,
     CONF_DIR,
     CONF_GEN_SWITCH,
@@ -17,11 +19,18 @@ from .const import (
     CONF_ROOM,
     CONF_SOURCES,
     CONF_TEST_CHANNEL,
+    CONF_UNAVAILABLE_AFTER,
+    CONF_UPDATE_BUDGET,
     CONF_VOLUME_ENTITY,
     CONST_DEFAULT_ROOM,
+    TIMEOUT,
+    UNAVAILABLE_AFTER,
+    UPDATE_BUDGET,
 )
 
 SCAN_INTERVAL = timedelta(seconds=10)
+SECONDS_SCHEMA = vol.All(vol.Coerce(float), vol.Range(min=0.5, max=60))
+FAILURES_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1, max=20))
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
@@ -33,10 +42,16 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_GEN_SWITCH, default=False): cv.boolean,
         vol.Optional(CONF_OUTPUT_PROGRAMME_IMAGE, default=True): cv.boolean,
         vol.Optional(CONF_LIVE_TV, default=True): cv.boolean,
+        vol.Optional(CONF_CACHE_IMAGES, default=False): cv.boolean,
         vol.Optional(CONF_COUNTRY): cv.string,
         vol.Optional(CONF_TEST_CHANNEL): cv.string,
         vol.Optional(CONF_SCAN_INTERVAL, default=SCAN_INTERVAL): cv.time_period,
         vol.Optional(CONF_VOLUME_ENTITY): cv.string,
+        vol.Optional(CONF_CALL_TIMEOUT, default=TIMEOUT): SECONDS_SCHEMA,
+        vol.Optional(CONF_UPDATE_BUDGET, default=UPDATE_BUDGET): SECONDS_SCHEMA,
+        vol.Optional(
+            CONF_UNAVAILABLE_AFTER, default=UNAVAILABLE_AFTER
+        ): FAILURES_SCHEMA,
     }
 )
 
@@ -0,0 +1,92 @@
+"""Start up of the Sky Q boxes, a few at a time."""
+import heapq
+import itertools
+import logging
+import time
+
+from .const import DOMAIN, STARTUP, STARTUP_CONCURRENCY
+from .storage import SkyQStartupStore
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_getStartup(hass, concurrency=STARTUP_CONCURRENCY):
+    """Get the start up shared by all boxes, loading how they did last time."""
+    hass.data.setdefault(DOMAIN, {})
+    startup = hass.data[DOMAIN].get(STARTUP)
+    if not startup:
+        startup = SkyQStartup(hass, concurrency)
+        hass.data[DOMAIN][STARTUP] = startup
+        await startup.async_load()
+    return startup
+
+
+class SkyQStartup:
+    """Start the boxes concurrently up to a limit, those reachable last time first."""
+
+    def __init__(self, hass, concurrency):
+        """Initialise the start up."""
+        self._hass = hass
+        self._concurrency = concurrency
+        self._store = SkyQStartupStore(hass)
+        self._boxes = {}
+        self._running = 0
+        self._waiting = []
+        self._order = itertools.count()
+        self._dispatchScheduled = False
+
+    async def async_load(self):
+        """Load how each box did when last started."""
+        self._boxes = await self._store.async_load()
+
+    def initTime(self, host):
+        """Get how long the box took to start, in seconds."""
+        return self._boxes.get(host, {}).get("init_time")
+
+    async def async_start(self, host, startFunction):
+        """Start a box once there is room, returning whether it was reachable.
+
+        Cancelling it, as unloading the entry does, drops it from the queue,
+        or frees its slot if it had one.
+        """
+        wasReachable = self._boxes.get(host, {}).get("reachable", True)
+        ready = self._hass.loop.create_future()
+        waiting = (not wasReachable, next(self._order), ready)
+        heapq.heappush(self._waiting, waiting)
+        self._scheduleDispatch()
+
+        try:
+            await ready
+            start = time.monotonic()
+            reachable = await startFunction()
+        finally:
+            if ready.done() and not ready.cancelled():
+                self._release()
+            elif waiting in self._waiting:
+                self._waiting.remove(waiting)
+                heapq.heapify(self._waiting)
+
+        initTime = time.monotonic() - start
+        self._boxes[host] = {"reachable": reachable, "init_time": round(initTime, 2)}
+        self._store.saveDelayed(self._boxes)
+        state = "reachable" if reachable else "unreachable"
+        _LOGGER.info(f"I0010S - Box started: {host} : {state} : {initTime:.2f}s")
+        return reachable
+
+    def _release(self):
+        self._running -= 1
+        self._scheduleDispatch()
+
+    def _scheduleDispatch(self):
+        # Wait for every box set up alongside to ask, so they start in order
+        if not self._dispatchScheduled:
+            self._dispatchScheduled = True
+            self._hass.loop.call_soon(self._dispatch)
+
+    def _dispatch(self):
+        self._dispatchScheduled = False
+        while self._waiting and self._running < self._concurrency:
+            _, _, ready = heapq.heappop(self._waiting)
+            if not ready.done():
+                self._running += 1
+                ready.set_result(None)
@@ -0,0 +1,66 @@
+"""Persistence of Sky Q box data between restarts."""
+import time
+
+from pyskyqremote.classes.channel import Channel
+
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    CHANNEL_STORAGE_KEY,
+    CHANNEL_STORAGE_VERSION,
+    STARTUP_SAVE_DELAY,
+    STARTUP_STORAGE_KEY,
+    STARTUP_STORAGE_VERSION,
+)
+
+
+class SkyQChannelStore:
+    """Channel list of a box, stored by serial number and EPG country."""
+
+    def __init__(self, hass, storeId):
+        """Initialise the store."""
+        self._store = Store(
+            hass, CHANNEL_STORAGE_VERSION, CHANNEL_STORAGE_KEY.format(storeId)
+        )
+
+    async def async_load(self):
+        """Load the stored channels, and when they were retrieved."""
+        data = await self._store.async_load()
+        if not data:
+            return None, None
+
+        channels = [
+            Channel(c["channelno"], c["channelname"], sf=c["sf"])
+            for c in data["channels"]
+        ]
+        return channels, data["retrieved"]
+
+    async def async_save(self, channels):
+        """Store the channels as retrieved now, returning the retrieval time."""
+        retrieved = time.time()
+        await self._store.async_save(
+            {
+                "retrieved": retrieved,
+                "channels": [
+                    {"channelno": c.channelno, "channelname": c.channelname, "sf": c.sf}
+                    for c in channels
+                ],
+            }
+        )
+        return retrieved
+
+
+class SkyQStartupStore:
+    """How each box did when last started, by host."""
+
+    def __init__(self, hass):
+        """Initialise the store."""
+        self._store = Store(hass, STARTUP_STORAGE_VERSION, STARTUP_STORAGE_KEY)
+
+    async def async_load(self):
+        """Load how the boxes did."""
+        return await self._store.async_load() or {}
+
+    def saveDelayed(self, boxes):
+        """Store how the boxes did, once they have all had a chance to start."""
+        self._store.async_delay_save(lambda: boxes, STARTUP_SAVE_DELAY)
@@ -0,0 +1,41 @@
+"""A bounded least recently used cache."""
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Dictionary-like cache evicting the least recently used entry when full."""
+
+    def __init__(self, maxsize):
+        """Initialise the cache."""
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __contains__(self, key):
+        """Check whether the key is cached, without refreshing its use."""
+        return key in self._entries
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Get a cached value, marking it as most recently used."""
+        if key not in self._entries:
+            return default
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key, value):
+        """Cache a value, evicting the least recently used entry if full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a cached value."""
+        return self._entries.pop(key, default)
+
+    def clear(self):
+        """Remove all cached values."""
+        self._entries.clear()
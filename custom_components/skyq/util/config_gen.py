@@ -3,22 +3,35 @@ A utility function to generate yaml config for SkyQ media players.
 
 To support easy usage with other home assistant integrations, e.g. google home
 """
+import os
+
+SWITCH_TEMPLATE = """    {switch_name}:
+      value_template: '{{{{"off"}}}}'
+      friendly_name: '{friendly_name} in the {room}'
+      turn_on:
+        service: media_player.{service}
+        data:
+          entity_id: {entity_id}
+{source}      turn_off:
+        service: script.placeholder
+"""
+SOURCE_TEMPLATE = "          source: '{switch}'\n"
 
 
 class SwitchMaker:
-    """The Switchmaker Class."""
+    """The Switchmaker Class.
+
+    Blocking file I/O, so run it in the executor. The file is only replaced
+    when the generated switches differ from those already in it.
+    """
 
     def __init__(self, config_dir, name, room, channels):
         """Initialise the Switcmaker."""
         self._name = name.replace(" ", "_").lower()
         self._room = room
         self._root = config_dir
+        self._switches = []
 
-        if self._root[-1] != "/":
-            self._root += "/"
-        self._f = open(
-            self._root + "skyq" + self._room.replace(" ", "") + ".yaml", "w+"
-        )
         self._addSwitch("pause", "pause", "media_pause")
         self._addSwitch("play", "play", "media_play")
         self._addSwitch("ff", "fastforward", "media_next_track")
@@ -28,7 +41,9 @@ class SwitchMaker:
         for ch in dedup_channels:
             self._addSwitch(ch, ch, "select_source", True)
 
-        self._f.close()
+        self.written = self._write(
+            os.path.join(self._root, "skyq" + self._room.replace(" ", "") + ".yaml")
+        )
 
     def _addSwitch(self, switch, friendly_name, service, source=False):
         """Add switch to switches."""
@@ -39,30 +54,33 @@ class SwitchMaker:
             + switch.replace(" ", "").lower()
             + self._room.replace(" ", "").lower()
         )
-        entity_id = "media_player." + self._name
         source_name = ""
         if source:
-            source_name = "          source: '" + switch + "'\n"
+            source_name = SOURCE_TEMPLATE.format(switch=switch)
 
-        self._f.write(
-            "    "
-            + switch_name
-            + ":\n"
-            + "      value_template: '{{\"off\"}}'\n"
-            + "      friendly_name: '"
-            + friendly_name
-            + " in the "
-            + self._room
-            + "'\n"
-            + "      turn_on:\n"
-            + "        service: media_player."
-            + service
-            + "\n"
-            + "        data:\n"
-            + "          entity_id: "
-            + entity_id
-            + "\n"
-            + source_name
-            + "      turn_off:\n"
-            + "        service: script.placeholder\n"
+        self._switches.append(
+            SWITCH_TEMPLATE.format(
+                switch_name=switch_name,
+                friendly_name=friendly_name,
+                room=self._room,
+                service=service,
+                entity_id="media_player." + self._name,
+                source=source_name,
+            )
         )
+
+    def _write(self, path):
+        """Atomically replace the file, if its content has changed."""
+        content = "".join(self._switches).encode("utf-8")
+        try:
+            with open(path, "rb") as switchFile:
+                if switchFile.read() == content:
+                    return False
+        except OSError:
+            pass
+
+        temporaryPath = path + ".tmp"
+        with open(temporaryPath, "wb") as switchFile:
+            switchFile.write(content)
+        os.replace(temporaryPath, path)
+        return True
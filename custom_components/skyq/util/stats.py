@@ -0,0 +1,50 @@
+"""Rolling latency statistics of the calls made to a Sky Q box."""
+from collections import deque
+
+
+class CallStats:
+    """Latency histograms over the most recent calls, by call type."""
+
+    def __init__(self, window):
+        """Initialise the statistics."""
+        self._window = window
+        self._calls = {}
+
+    def record(self, callType, duration, failed=False):
+        """Record the duration of a call, in seconds."""
+        stats = self._calls.get(callType)
+        if not stats:
+            stats = self._calls[callType] = _CallTypeStats(self._window)
+        stats.durations.append(duration)
+        stats.count += 1
+        if failed:
+            stats.errors += 1
+
+    def errors(self):
+        """Count the failed calls, of all types."""
+        return sum(stats.errors for stats in self._calls.values())
+
+    def summary(self):
+        """Summarise the calls of each type, with the percentiles in milliseconds."""
+        return {
+            callType: stats.summary() for callType, stats in sorted(self._calls.items())
+        }
+
+
+class _CallTypeStats:
+    """Counts and recent durations of one type of call."""
+
+    __slots__ = ("count", "errors", "durations")
+
+    def __init__(self, window):
+        self.count = 0
+        self.errors = 0
+        self.durations = deque(maxlen=window)
+
+    def summary(self):
+        ordered = sorted(self.durations)
+        summary = {"count": self.count, "errors": self.errors}
+        for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            rank = min(len(ordered) - 1, int(fraction * len(ordered)))
+            summary[name] = round(ordered[rank] * 1000, 1)
+        return summary
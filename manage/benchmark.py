@@ -0,0 +1,277 @@
+"""Benchmark the update cycle of the integration against simulated Sky Q boxes.
+
+Runs a coordinator and media player entity for each simulated box inside a
+minimal Home Assistant instance, refreshing all of the boxes together for a
+number of cycles, then reports:
+
+- update cycle latency percentiles, per box
+- occupancy of the shared executor, which the integration should leave free
+- how long blocking jobs queued for a thread of the integration's own executor
+- event loop lag, sampled throughout the run
+- tune latency, from the first to the last key press of a channel number
+
+    python3 manage/benchmark.py --boxes 20 --cycles 30 --latency 0.05 --jitter 0.02
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyskyqremote.country.remote_gb as remote_gb  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.skyq.appimages import async_getAppImages  # noqa: E402
+from custom_components.skyq.classes.config import build_config  # noqa: E402
+from custom_components.skyq.client import AsyncSkyQRemote  # noqa: E402
+from custom_components.skyq.coordinator import SkyQCoordinator  # noqa: E402
+from custom_components.skyq.executor import getExecutor  # noqa: E402
+from custom_components.skyq.media_player import SkyQDevice  # noqa: E402
+from skyq_simulator import CHANNELS, SCHEDULE_URL, async_startBoxes  # noqa: E402
+
+LOOP_LAG_INTERVAL = 0.01
+EXECUTOR_SAMPLE_INTERVAL = 0.005
+
+
+class ExecutorProbe:
+    """Track the blocking jobs handed to the shared executor of hass."""
+
+    def __init__(self, hass):
+        """Wrap the executor job submission of hass."""
+        self.waits = []
+        self.busySamples = []
+        self.peakBusy = 0
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._submit = hass.async_add_executor_job
+        hass.async_add_executor_job = self._async_add_executor_job
+
+    def sample(self):
+        """Record how many executor threads are busy with Sky Q work."""
+        self.busySamples.append(self._busy)
+
+    def _async_add_executor_job(self, target, *args):
+        submitted = time.perf_counter()
+
+        def run():
+            with self._lock:
+                self.waits.append(time.perf_counter() - submitted)
+                self._busy += 1
+                self.peakBusy = max(self.peakBusy, self._busy)
+            try:
+                return target(*args)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+        return self._submit(run)
+
+
+def percentiles(values):
+    """Summarise the values as count, p50, p95, p99 and max."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": ordered[-1],
+    }
+
+
+async def async_sampleLoop(running, lags, probe):
+    """Measure how late the event loop wakes up, sampling the executor alongside."""
+    nextExecutorSample = 0
+    while running.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        now = time.perf_counter()
+        lags.append(max(0, now - start - LOOP_LAG_INTERVAL))
+        if now >= nextExecutorSample:
+            probe.sample()
+            nextExecutorSample = now + EXECUTOR_SAMPLE_INTERVAL
+
+
+async def async_setupBox(hass, appImages, box, index):
+    """Set up the remote, coordinator and entity for a simulated box."""
+    remote = AsyncSkyQRemote(hass, box.address)
+    await remote.async_setupDevice()
+    config = build_config(
+        None, f"Sky Q {index}", {"channel_sources": [CHANNELS[index]["t"]]}
+    )
+    coordinator = SkyQCoordinator(hass, remote, config)
+    entity = SkyQDevice(coordinator, appImages, None)
+    entity.hass = hass
+    entity.entity_id = f"media_player.sky_q_{index}"
+    await entity.async_added_to_hass()
+    return coordinator
+
+
+async def async_timeRefresh(coordinator, latencies):
+    """Refresh a box, recording how long the cycle took."""
+    start = time.perf_counter()
+    await coordinator.async_refresh()
+    latencies.append(time.perf_counter() - start)
+
+
+async def async_timeTune(coordinator, box, tuneLatencies):
+    """Tune a box to a random channel, recording how long the key presses took."""
+    channelno = random.choice(CHANNELS)["c"]
+    keys = len(box.keys)
+    start = time.perf_counter()
+    await coordinator.remote.press(list(channelno))
+    tuneLatencies.append(time.perf_counter() - start)
+    if len(box.keys) - keys != len(channelno):
+        raise RuntimeError(f"Box {box.serial} missed key presses")
+
+
+async def async_benchmark(args):
+    """Run the benchmark, returning its results."""
+    boxes = await async_startBoxes(
+        args.boxes, args.latency, args.jitter, args.failure_rate
+    )
+    remote_gb.SCHEDULE_URL = SCHEDULE_URL.format(boxes[0].address)
+
+    with tempfile.TemporaryDirectory() as configDir:
+        hass = HomeAssistant(configDir)
+        probe = ExecutorProbe(hass)
+        appImages = await async_getAppImages(hass)
+
+        setupStart = time.perf_counter()
+        coordinators = await asyncio.gather(
+            *[
+                async_setupBox(hass, appImages, box, index)
+                for index, box in enumerate(boxes)
+            ]
+        )
+        setupTime = time.perf_counter() - setupStart
+
+        latencies = []
+        lags = []
+        running = asyncio.Event()
+        running.set()
+        sampler = asyncio.ensure_future(async_sampleLoop(running, lags, probe))
+
+        runStart = time.perf_counter()
+        for _ in range(args.cycles):
+            # Change channel on some of the boxes, so not every cycle is a cache hit
+            for box in boxes:
+                if random.random() < args.churn:
+                    channel = random.choice(CHANNELS)
+                    box.setState(sid=int(channel["sid"]), pvrId=None)
+            await asyncio.gather(
+                *[async_timeRefresh(c, latencies) for c in coordinators]
+            )
+            if args.interval:
+                await asyncio.sleep(args.interval)
+        runTime = time.perf_counter() - runStart
+
+        tuneLatencies = []
+        for _ in range(args.tunes):
+            await asyncio.gather(
+                *[
+                    async_timeTune(c, box, tuneLatencies)
+                    for c, box in zip(coordinators, boxes)
+                ]
+            )
+
+        running.clear()
+        await sampler
+        skyqExecutor = getExecutor(hass).summary()
+        for coordinator in coordinators:
+            await coordinator.async_stop()
+        await hass.async_stop(force=True)
+
+    for box in boxes:
+        await box.async_stop()
+
+    busySamples = probe.busySamples
+    return {
+        "boxes": args.boxes,
+        "cycles": args.cycles,
+        "setup": setupTime,
+        "run": runTime,
+        "cycle_latency": percentiles(latencies),
+        "executor": {
+            "mean_busy": sum(busySamples) / len(busySamples) if busySamples else 0,
+            "peak_busy": probe.peakBusy,
+            "wait": percentiles(probe.waits),
+        },
+        "skyq_executor": skyqExecutor,
+        "loop_lag": percentiles(lags),
+        "tune_latency": percentiles(tuneLatencies),
+        "requests": sum(sum(box.requests.values()) for box in boxes),
+    }
+
+
+def report(results):
+    """Print the results for reading."""
+
+    def times(summary):
+        if not summary["count"]:
+            return "n=0"
+        return f"n={summary['count']} " + " ".join(
+            f"{key}={summary[key] * 1000:.1f}ms" for key in ("p50", "p95", "p99", "max")
+        )
+
+    print(f"Boxes: {results['boxes']}, cycles: {results['cycles']}")
+    print(f"Setup: {results['setup']:.2f}s, run: {results['run']:.2f}s")
+    print(f"Box requests: {results['requests']}")
+    print(f"Cycle latency: {times(results['cycle_latency'])}")
+    executor = results["executor"]
+    print(
+        f"Shared executor: mean busy={executor['mean_busy']:.2f} "
+        f"peak busy={executor['peak_busy']} wait {times(executor['wait'])}"
+    )
+    skyqExecutor = results["skyq_executor"]
+    wait = skyqExecutor["wait"] or {"count": 0}
+    print(
+        f"Sky Q executor: threads={skyqExecutor['threads']} "
+        f"peak queued={skyqExecutor['peak_queued']} wait n={wait['count']} "
+        + " ".join(
+            f"{key}={wait[key]}ms" for key in ("p50", "p95", "p99") if key in wait
+        )
+    )
+    print(f"Event loop lag: {times(results['loop_lag'])}")
+    print(f"Tune latency: {times(results['tune_latency'])}")
+
+
+def main():
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boxes", type=int, default=5)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--churn", type=float, default=0.2)
+    parser.add_argument("--tunes", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    # The entities are driven directly, rather than through an entity platform
+    logging.getLogger("homeassistant.helpers.entity").setLevel(logging.ERROR)
+    results = asyncio.run(async_benchmark(args))
+    report(results)
+    if args.json:
+        with open(args.json, "w") as resultsFile:
+            json.dump(results, resultsFile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
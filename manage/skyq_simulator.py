@@ -0,0 +1,435 @@
+"""Simulated Sky Q box for local development and benchmarking.
+
+Answers the REST, websocket, UPnP/SOAP and remote control endpoints used by the
+integration, plus a stand-in for the UK EPG schedule service. Each simulated box
+binds to its own loopback address so that the standard Sky Q ports can be used,
+e.g. 127.0.0.2, 127.0.0.3, ...
+
+    python3 manage/skyq_simulator.py --boxes 5 --latency 0.05 --jitter 0.02
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import random
+import time
+import uuid
+
+from aiohttp import ClientSession, WSMsgType, web
+
+REST_PORT = 9006
+UPNP_PORT = 49153
+REMOTE_PORT = 49160
+DESCRIPTION_INDEX = 2
+CONTROL_PATH = "/SkyPlay2"
+EVENT_PATH = "/SkyPlay2/event"
+BROWSE_EVENT_PATH = "/SkyBrowse2/event"
+EPG_APP = "com.bskyb.epgui"
+SCHEDULE_PATH = "/hawk/linear/schedule/{date}/{sid}"
+SCHEDULE_URL = "http://{0}:9006/hawk/linear/schedule/{{1}}/{{0}}"
+PROGRAMME_LENGTH = 1800
+
+KEYS = {
+    0: "power",
+    11: "home",
+    2: "dismiss",
+    64: "play",
+    65: "pause",
+    69: "fastforward",
+    71: "rewind",
+}
+KEYS.update({48 + n: str(n) for n in range(10)})
+
+DESCRIPTION = """<?xml version="1.0"?>
+<root xmlns="urn:schemas-upnp-org:device-1-0">
+  <device>
+    <deviceType>urn:schemas-nds-com:device:SkyControl:2</deviceType>
+    <serviceList>
+      <service>
+        <serviceType>urn:schemas-nds-com:service:SkyPlay:2</serviceType>
+        <serviceId>urn:nds-com:serviceId:SkyPlay</serviceId>
+        <controlURL>{control}</controlURL>
+        <eventSubURL>{event}</eventSubURL>
+      </service>
+    </serviceList>
+  </device>
+</root>"""
+
+SERVE_DESCRIPTION = """<?xml version="1.0"?>
+<root xmlns="urn:schemas-upnp-org:device-1-0">
+  <device>
+    <deviceType>urn:schemas-nds-com:device:SkyServe:2</deviceType>
+    <serviceList>
+      <service>
+        <serviceType>urn:schemas-nds-com:service:SkyBrowse:2</serviceType>
+        <serviceId>urn:nds-com:serviceId:SkyBrowse</serviceId>
+        <controlURL>/SkyBrowse2</controlURL>
+        <eventSubURL>{event}</eventSubURL>
+      </service>
+    </serviceList>
+  </device>
+</root>"""
+
+SOAP_RESPONSE = """<?xml version="1.0"?>
+<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body>
+    <u:{method}Response xmlns:u="urn:schemas-nds-com:service:SkyPlay:2">
+{values}
+    </u:{method}Response>
+  </s:Body>
+</s:Envelope>"""
+
+LAST_CHANGE = """<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">
+  <e:property><LastChange>{state}</LastChange></e:property>
+</e:propertyset>"""
+
+SYSTEM_UPDATE = """<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">
+  <e:property><SystemUpdateID>{updateId}</SystemUpdateID></e:property>
+</e:propertyset>"""
+
+CHANNELS = [
+    {"c": str(101 + n), "t": f"Channel {101 + n}", "sid": str(2000 + n), "sf": "hd"}
+    for n in range(400)
+]
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SimulatedBox:
+    """A single simulated Sky Q box."""
+
+    def __init__(self, address, serial, latency=0.0, jitter=0.0, failure_rate=0.0):
+        """Initialise the box state."""
+        self.address = address
+        self.serial = serial
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.standby = False
+        self.paused = False
+        self.app = EPG_APP
+        self.sid = int(CHANNELS[0]["sid"])
+        self.pvrId = None
+        self.deletedRecordings = set()
+        self.systemUpdateId = 1
+        self.requests = {}
+        self.keys = []
+        self._subscriptions = {}
+        self._websockets = set()
+        self._runners = []
+        self._servers = []
+        self._digits = ""
+
+    async def async_start(self):
+        """Start listening on the box ports."""
+        rest = web.Application(middlewares=[self._middleware])
+        rest.router.add_get("/as/system/information", self._systemInformation)
+        rest.router.add_get("/as/system/deviceinformation", self._deviceInformation)
+        rest.router.add_get("/as/services", self._services)
+        rest.router.add_get("/as/pvr/details/{pvrId}", self._recording)
+        rest.router.add_get("/as/apps/status", self._appStatus)
+        rest.router.add_get(SCHEDULE_PATH, self._schedule)
+
+        upnp = web.Application(middlewares=[self._middleware])
+        upnp.router.add_get("/description{index}.xml", self._description)
+        upnp.router.add_post(CONTROL_PATH, self._soap)
+        upnp.router.add_route("SUBSCRIBE", EVENT_PATH, self._subscribe)
+        upnp.router.add_route("UNSUBSCRIBE", EVENT_PATH, self._unsubscribe)
+        upnp.router.add_route("SUBSCRIBE", BROWSE_EVENT_PATH, self._subscribe)
+        upnp.router.add_route("UNSUBSCRIBE", BROWSE_EVENT_PATH, self._unsubscribe)
+
+        for app, port in ((rest, REST_PORT), (upnp, UPNP_PORT)):
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, self.address, port).start()
+            self._runners.append(runner)
+
+        self._servers.append(
+            await asyncio.start_server(self._remote, self.address, REMOTE_PORT)
+        )
+
+    async def async_stop(self):
+        """Stop the box."""
+        for websock in list(self._websockets):
+            await websock.close()
+        for server in self._servers:
+            server.close()
+        for runner in self._runners:
+            await runner.cleanup()
+
+    def setState(self, **state):
+        """Change the box state and notify any subscribers."""
+        appChanged = "app" in state and state["app"] != self.app
+        for key, value in state.items():
+            setattr(self, key, value)
+        asyncio.ensure_future(self._notify(appChanged))
+
+    def deleteRecording(self, pvrId):
+        """Delete a recording, notifying browse subscribers."""
+        self.deletedRecordings.add(pvrId)
+        self.systemUpdateId += 1
+        if self.pvrId == pvrId:
+            self.setState(pvrId=None)
+        asyncio.ensure_future(self._notifyBrowse())
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        name = request.path.split("/")[-1] if request.method == "GET" else None
+        name = name or request.headers.get("SOAPACTION", request.method)
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0, random.gauss(self.latency, self.jitter)))
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise web.HTTPInternalServerError()
+        return await handler(request)
+
+    async def _systemInformation(self, request):
+        return web.json_response(
+            {
+                "activeStandby": self.standby,
+                "hardwareModel": "ES240",
+                "manufacturer": "Simulated",
+            }
+        )
+
+    async def _deviceInformation(self, request):
+        return web.json_response(
+            {
+                "ASVersion": "Q200",
+                "IPAddress": self.address,
+                "countryCode": "GBR",
+                "hardwareName": "Falcon",
+                "modelNumber": "Q",
+                "serialNumber": self.serial,
+                "versionNumber": "1.0",
+            }
+        )
+
+    async def _services(self, request):
+        return web.json_response({"services": CHANNELS})
+
+    async def _recording(self, request):
+        pvrId = request.match_info["pvrId"]
+        if pvrId in self.deletedRecordings:
+            raise web.HTTPNotFound()
+        return web.json_response(
+            {
+                "details": {
+                    "cn": "Channel 101",
+                    "t": f"Recording {pvrId}",
+                    "seasonnumber": 1,
+                    "episodenumber": 2,
+                    "programmeuuid": 12345,
+                    "ast": int(time.time()) - 600,
+                    "finald": 3600,
+                }
+            }
+        )
+
+    async def _appStatus(self, request):
+        websock = web.WebSocketResponse()
+        await websock.prepare(request)
+        self._websockets.add(websock)
+        try:
+            await websock.send_str(self._appsJson())
+            async for message in websock:
+                if message.type == WSMsgType.CLOSE:
+                    break
+        finally:
+            self._websockets.discard(websock)
+        return websock
+
+    async def _schedule(self, request):
+        start = datetime.datetime.strptime(request.match_info["date"], "%Y%m%d")
+        start = int(start.replace(tzinfo=datetime.timezone.utc).timestamp())
+        sid = request.match_info["sid"]
+        events = [
+            {
+                "st": start + index * PROGRAMME_LENGTH,
+                "d": PROGRAMME_LENGTH,
+                "t": f"Programme {sid} {index}",
+                "programmeuuid": int(sid) * 100 + index,
+                "seasonnumber": 1,
+                "episodenumber": index + 1,
+            }
+            for index in range(86400 // PROGRAMME_LENGTH)
+        ]
+        return web.json_response({"schedule": [{"sid": sid, "events": events}]})
+
+    async def _description(self, request):
+        if int(request.match_info["index"]) == DESCRIPTION_INDEX - 1:
+            return web.Response(
+                text=SERVE_DESCRIPTION.format(event=BROWSE_EVENT_PATH),
+                content_type="text/xml",
+            )
+        if int(request.match_info["index"]) != DESCRIPTION_INDEX:
+            raise web.HTTPNotFound()
+        return web.Response(
+            text=DESCRIPTION.format(control=CONTROL_PATH, event=EVENT_PATH),
+            content_type="text/xml",
+        )
+
+    async def _soap(self, request):
+        action = request.headers.get("SOAPACTION", "")
+        if "GetTransportInfo" in action:
+            state = "PAUSED_PLAYBACK" if self.paused else "PLAYING"
+            return self._soapResponse(
+                "GetTransportInfo", {"CurrentTransportState": state}
+            )
+        if "GetMediaInfo" in action:
+            if self.pvrId:
+                uri = f"file://pvr/{self.pvrId[1:]}"
+            else:
+                uri = f"xsi://{self.sid:x}"
+            return self._soapResponse("GetMediaInfo", {"CurrentURI": uri})
+        raise web.HTTPBadRequest()
+
+    def _soapResponse(self, method, values):
+        values = "\n".join(f"      <{k}>{v}</{k}>" for k, v in values.items())
+        return web.Response(
+            text=SOAP_RESPONSE.format(method=method, values=values),
+            content_type="text/xml",
+        )
+
+    async def _subscribe(self, request):
+        sid = request.headers.get("SID")
+        if sid:
+            if sid not in self._subscriptions:
+                raise web.HTTPPreconditionFailed()
+        else:
+            callback = request.headers.get("CALLBACK", "").strip("<>")
+            if not callback:
+                raise web.HTTPPreconditionFailed()
+            sid = f"uuid:{uuid.uuid4()}"
+            self._subscriptions[sid] = {"path": request.path, "callback": callback}
+            asyncio.ensure_future(self._sendEvent(sid))
+        return web.Response(headers={"SID": sid, "TIMEOUT": "Second-300"})
+
+    async def _unsubscribe(self, request):
+        self._subscriptions.pop(request.headers.get("SID"), None)
+        return web.Response()
+
+    async def _notify(self, appChanged):
+        for sid, subscription in list(self._subscriptions.items()):
+            if subscription["path"] == EVENT_PATH:
+                await self._sendEvent(sid)
+        if appChanged:
+            for websock in list(self._websockets):
+                await websock.send_str(self._appsJson())
+
+    async def _notifyBrowse(self):
+        for sid, subscription in list(self._subscriptions.items()):
+            if subscription["path"] == BROWSE_EVENT_PATH:
+                await self._sendEvent(sid)
+
+    async def _sendEvent(self, sid):
+        subscription = self._subscriptions.get(sid)
+        if not subscription:
+            return
+        if subscription["path"] == BROWSE_EVENT_PATH:
+            data = SYSTEM_UPDATE.format(updateId=self.systemUpdateId)
+        else:
+            state = "PAUSED_PLAYBACK" if self.paused else "PLAYING"
+            data = LAST_CHANGE.format(state=state)
+        seq = subscription.get("seq", 0)
+        subscription["seq"] = seq + 1
+        try:
+            async with ClientSession() as session:
+                await session.request(
+                    "NOTIFY",
+                    subscription["callback"],
+                    headers={
+                        "SID": sid,
+                        "NT": "upnp:event",
+                        "NTS": "upnp:propchange",
+                        "SEQ": str(seq),
+                    },
+                    data=data,
+                )
+        except OSError:
+            self._subscriptions.pop(sid, None)
+
+    def _appsJson(self):
+        return json.dumps({"apps": [{"appId": self.app, "status": "VISIBLE"}]})
+
+    async def _remote(self, reader, writer):
+        try:
+            # Handshake, as the box does it: the client echoes 12 bytes of the
+            # greeting, then single bytes, until the 24 byte message.
+            writer.write(b"SKY 000.001\n")
+            await reader.readexactly(12)
+            for message in (b"\x01\x01", b"\x00\x00\x00\x00"):
+                writer.write(message)
+                await reader.readexactly(1)
+            writer.write(bytes(24))
+            await writer.drain()
+            while True:
+                command = await reader.readexactly(8)
+                if command[1] == 1:
+                    self._press((command[6] - 224) * 16 + command[7])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _press(self, code):
+        key = KEYS.get(code, str(code))
+        self.keys.append((time.monotonic(), key))
+        if key == "power":
+            self.setState(standby=True)
+        elif key in ("home", "dismiss"):
+            self.setState(standby=False)
+        elif key == "pause":
+            self.setState(paused=True)
+        elif key == "play":
+            self.setState(paused=False)
+        elif key.isdigit():
+            self._digits += key
+            if len(self._digits) == 3:
+                channel = next((c for c in CHANNELS if c["c"] == self._digits), None)
+                self._digits = ""
+                if channel:
+                    self.setState(sid=int(channel["sid"]), pvrId=None, paused=False)
+
+
+async def async_startBoxes(count, latency=0.0, jitter=0.0, failure_rate=0.0):
+    """Start a number of simulated boxes on consecutive loopback addresses."""
+    boxes = []
+    for index in range(count):
+        box = SimulatedBox(
+            f"127.0.0.{index + 2}", f"SIM{index:05d}", latency, jitter, failure_rate
+        )
+        await box.async_start()
+        boxes.append(box)
+    return boxes
+
+
+def main():
+    """Run simulated boxes until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boxes", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    loop = asyncio.get_event_loop()
+    boxes = loop.run_until_complete(
+        async_startBoxes(args.boxes, args.latency, args.jitter, args.failure_rate)
+    )
+    for box in boxes:
+        _LOGGER.info(f"Simulated box {box.serial} listening on {box.address}")
+    _LOGGER.info(f"EPG schedules served at {SCHEDULE_URL.format(boxes[0].address)}")
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for box in boxes:
+            loop.run_until_complete(box.async_stop())
+
+
+if __name__ == "__main__":
+    main()